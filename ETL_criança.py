@@ -2,23 +2,19 @@
 Script para processar dados do SISVAN via API
 Coleta dados de todas as raças e idades e salva em CSV
 """
-import json
 import pandas as pd
 from bs4 import BeautifulSoup
 from io import StringIO
 import os
+import re
 import requests
 import time
+import unicodedata
 from typing import Dict, List, Optional, Tuple
 
-# Configuração: dados carregados de utils.json (raças, sexos, fases de idade)
-UTILS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils.json")
-with open(UTILS_JSON, "r", encoding="utf-8") as f:
-    _utils = json.load(f)
-RACAS = _utils["RACAS"]
-SEXOS = _utils["SEXOS"]
-# FASES_IDADE: chaves string, valores (inicio, fim, nome)
-FASES_IDADE = {k: (v[0], v[1], v[2]) for k, v in _utils["FASES_IDADE"].items()}
+# Configuração: raças, sexos e fases de idade vêm de utils.json via config.dimensoes(),
+# lido sob demanda na primeira coleta (e não na importação do módulo)
+from config import dimensoes, fases_indice, indices_cri
 
 
 # ============================================================================
@@ -110,10 +106,9 @@ def limpar_colunas(df: pd.DataFrame) -> pd.DataFrame:
 def salvar_csv_powerbi(df: pd.DataFrame, path: str) -> None:
     """Salva CSV no formato que o Power BI (PT-BR) aceita melhor: separador ; e decimal com ,"""
     df_out = df.copy()
-    perc_cols = ["MuitoBaixo_Perc", "Baixo_Perc", "Adequado_Perc", "Elevado_Perc"]
+    perc_cols = [col for col in df_out.columns if col.endswith("_Perc")]
     for col in perc_cols:
-        if col in df_out.columns:
-            df_out[col] = df_out[col].astype(str).str.replace(".", ",", regex=False)
+        df_out[col] = df_out[col].astype(str).str.replace(".", ",", regex=False)
     df_out.to_csv(path, index=False, sep=";", encoding="utf-8-sig")
 
 
@@ -125,8 +120,50 @@ COLUNAS_SISVAN = [
 ]
 
 
-def processar_html_para_dataframe(html_content: str) -> Optional[pd.DataFrame]:
-    """Processa HTML no formato SISVAN (Relatórios de Produção): extrai linhas do tbody com 14 colunas."""
+def colunas_indice(indice: str = "1") -> List[str]:
+    """Colunas do relatório para o índice nu_indice_cri: localização, Qtd/Perc de cada classe e Total.
+    Para o índice 1 (Peso x Idade) é igual a COLUNAS_SISVAN."""
+    _, classes, _ = indices_cri()[indice]
+    colunas = COLUNAS_SISVAN[:5]
+    for classe in classes:
+        colunas += [f"{classe}_Qtd", f"{classe}_Perc"]
+    return colunas + ["Total"]
+
+
+def _normalizar_rotulo(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(texto.lower().split())
+
+
+def classes_do_cabecalho(table, indice: str = "1") -> Optional[List[str]]:
+    """Classes (prefixos de coluna) na ordem do cabeçalho da tabela, lidas dos rótulos com
+    colspan=2 (Quantidade + %). Cada rótulo casa com o rótulo de classe mais longo contido nele,
+    entre todos os índices ("obesidade grave" antes de "obesidade"). None se a tabela não tiver
+    esses rótulos; ValueError se algum rótulo não for uma classe do índice."""
+    _, classes, _ = indices_cri()[indice]
+    por_rotulo = {r: c for c, r in classes.items()}
+    conhecidos = {r for _, cls, _ in indices_cri().values() for r in cls.values()}
+    rotulos = [_normalizar_rotulo(c.get_text(" ", strip=True)) for c in table.find_all(["th", "td"], colspan="2")]
+    if not rotulos:
+        return None
+    encontradas = []
+    for rotulo in rotulos:
+        casados = [r for r in conhecidos if re.search(rf"\b{re.escape(r)}\b", rotulo)]
+        melhor = max(casados, key=len) if casados else None
+        if melhor not in por_rotulo:
+            raise ValueError(f"classe '{rotulo}' do relatório não pertence ao índice {indice}")
+        encontradas.append(por_rotulo[melhor])
+    if len(set(encontradas)) != len(encontradas):
+        raise ValueError(f"cabeçalho ambíguo para o índice {indice}: {rotulos}")
+    return encontradas
+
+
+def processar_html_para_dataframe(html_content: str, indice: str = "1") -> Optional[pd.DataFrame]:
+    """Processa HTML no formato SISVAN (Relatórios de Produção): extrai linhas do tbody com as
+    colunas do índice (14 colunas para o índice 1). As classes vêm do cabeçalho da tabela; as
+    que não aparecem nesta fase (ex.: IMC x Idade, 0-5 x 5-10 anos) ficam vazias. Sem
+    cabeçalho, a tabela é lida por posição."""
+    colunas = colunas_indice(indice)
     try:
         soup = BeautifulSoup(html_content, 'html.parser')
         tables = soup.find_all('table')
@@ -138,21 +175,26 @@ def processar_html_para_dataframe(html_content: str) -> Optional[pd.DataFrame]:
             tbody = table.find('tbody')
             if not tbody:
                 continue
+            classes = classes_do_cabecalho(table, indice)
+            colunas_tabela = colunas if classes is None else (
+                COLUNAS_SISVAN[:5] + [f"{c}_{m}" for c in classes for m in ("Qtd", "Perc")] + ["Total"])
+            n_colunas = len(colunas_tabela)
+            idx_perc = set(range(6, n_colunas - 1, 2))
             for tr in tbody.find_all('tr'):
                 tds = tr.find_all('td')
-                if len(tds) != 14:
+                if len(tds) != n_colunas:
                     continue
-                row = []
+                row = {col: "" for col in colunas}
                 for i, td in enumerate(tds):
                     val = td.get_text(strip=True)
-                    if i in (6, 8, 10, 12):
+                    if i in idx_perc:
                         val = val.replace("%", "").strip()
-                    row.append(val)
+                    row[colunas_tabela[i]] = val
                 linhas.append(row)
         if not linhas:
-            print("  ERRO: Nenhum dado encontrado nas tabelas (nenhuma linha com 14 colunas no tbody)")
+            print(f"  ERRO: Nenhum dado encontrado nas tabelas (nenhuma linha com as colunas do índice {indice} no tbody)")
             return None
-        df_final = pd.DataFrame(linhas, columns=COLUNAS_SISVAN)
+        df_final = pd.DataFrame(linhas, columns=colunas)
         df_final = df_final[
             ~df_final['Municipio'].astype(str).str.contains('TOTAL', case=False, na=False)
         ]
@@ -162,6 +204,9 @@ def processar_html_para_dataframe(html_content: str) -> Optional[pd.DataFrame]:
             ]
         df_final = df_final.reset_index(drop=True)
         return df_final
+    except ValueError as e:
+        print(f"  ERRO: {e}")
+        return None
     except Exception as e:
         print(f"  ERRO ao processar HTML: {e}")
         import traceback
@@ -173,10 +218,15 @@ def processar_html_para_dataframe(html_content: str) -> Optional[pd.DataFrame]:
 # FUNÇÕES DE REQUISIÇÃO HTTP
 # ============================================================================
 
-def criar_payload(raca_codigo: str, fase_idade: str, sexo_codigo: str, ano: int) -> Dict[str, str]:
-    """Cria payload para requisição com raça, fase de idade, sexo e ano"""
+def criar_payload(raca_codigo: str, fase_idade: str, sexo_codigo: str, ano: int,
+                  indice: str = "1", municipio: str = "99") -> Dict[str, str]:
+    """Cria payload para requisição com raça, fase de idade, sexo, ano, índice (nu_indice_cri)
+    e município (código IBGE; "99" = todos os municípios da UF)"""
+    _, _, FASES_IDADE = dimensoes()
     payload = PAYLOAD_BASE.copy()
     payload["nuAno"] = str(ano)
+    payload["nu_indice_cri"] = indice
+    payload["coMunicipioIbge"] = municipio
     payload["ds_raca_cor2"] = raca_codigo
     payload["ds_sexo2"] = sexo_codigo
     idade_inicio, idade_fim, _ = FASES_IDADE[fase_idade]
@@ -186,14 +236,17 @@ def criar_payload(raca_codigo: str, fase_idade: str, sexo_codigo: str, ano: int)
 
 
 def fazer_requisicao(session: requests.Session, raca_codigo: str, fase_idade: str, sexo_codigo: str,
-                     ano: int, tentativa: int = 1, max_tentativas: int = 3) -> Optional[str]:
+                     ano: int, tentativa: int = 1, max_tentativas: int = 3,
+                     indice: str = "1", municipio: str = "99") -> Optional[str]:
     """Faz requisição POST para API e retorna HTML"""
+    RACAS, SEXOS, FASES_IDADE = dimensoes()
     raca_nome = RACAS.get(raca_codigo, "DESCONHECIDA")
     sexo_nome = SEXOS.get(sexo_codigo, "DESCONHECIDO")
     _, _, fase_nome = FASES_IDADE[fase_idade]
     print(f"    [{tentativa}/{max_tentativas}] Ano {ano} | Raça: {raca_codigo}-{raca_nome} | "
-          f"Sexo: {sexo_codigo}-{sexo_nome} | Fase: {fase_idade}-{fase_nome}")
-    payload = criar_payload(raca_codigo, fase_idade, sexo_codigo, ano)
+          f"Sexo: {sexo_codigo}-{sexo_nome} | Fase: {fase_idade}-{fase_nome} | Índice: {indice}"
+          + (f" | Município: {municipio}" if municipio != "99" else ""))
+    payload = criar_payload(raca_codigo, fase_idade, sexo_codigo, ano, indice, municipio)
     try:
         response = session.post(URL_POST, data=payload, headers=HEADERS, timeout=30)
         if response.status_code == 200:
@@ -201,13 +254,15 @@ def fazer_requisicao(session: requests.Session, raca_codigo: str, fase_idade: st
         print(f"      ERRO: Status {response.status_code}")
         if tentativa < max_tentativas:
             time.sleep(2)
-            return fazer_requisicao(session, raca_codigo, fase_idade, sexo_codigo, ano, tentativa + 1, max_tentativas)
+            return fazer_requisicao(session, raca_codigo, fase_idade, sexo_codigo, ano, tentativa + 1, max_tentativas,
+                                    indice, municipio)
         return None
     except Exception as e:
         print(f"      ERRO na requisição: {e}")
         if tentativa < max_tentativas:
             time.sleep(2)
-            return fazer_requisicao(session, raca_codigo, fase_idade, sexo_codigo, ano, tentativa + 1, max_tentativas)
+            return fazer_requisicao(session, raca_codigo, fase_idade, sexo_codigo, ano, tentativa + 1, max_tentativas,
+                                    indice, municipio)
         return None
 
 
@@ -215,58 +270,87 @@ def fazer_requisicao(session: requests.Session, raca_codigo: str, fase_idade: st
 # FUNÇÕES DE COLETA E CONSOLIDAÇÃO
 # ============================================================================
 
-def coletar_dados_para_ano(ano: int) -> pd.DataFrame:
-    """Coleta dados de todas as combinações (raça, fase, sexo) para um único ano. Adiciona coluna Ano."""
+def anotar_combinacao(df: pd.DataFrame, ano: int, raca_codigo: str, fase_idade: str,
+                      sexo_codigo: str, indice: Optional[str] = None) -> pd.DataFrame:
+    """Adiciona ao DataFrame de uma combinação as colunas Ano, Raça, Sexo e Fase
+    (e Indice/Indice_Nome quando a coleta é por índice)."""
+    RACAS, SEXOS, FASES_IDADE = dimensoes()
+    _, _, fase_nome = FASES_IDADE[fase_idade]
+    df["Ano"] = ano
+    df["Raca_Codigo"] = raca_codigo
+    df["Raca_Nome"] = RACAS[raca_codigo]
+    df["Sexo_Codigo"] = sexo_codigo
+    df["Sexo_Nome"] = SEXOS[sexo_codigo]
+    df["Fase_Idade"] = fase_idade
+    df["Fase_Nome"] = fase_nome
+    if indice is not None:
+        df["Indice"] = indice
+        df["Indice_Nome"] = indices_cri()[indice][0]
+    return df
+
+
+def obter_sessao() -> Optional[requests.Session]:
+    """Abre uma sessão no servidor (cookie da página index); None se falhar."""
+    session = requests.Session()
+    print("\n1. Obtendo sessão do servidor...")
+    try:
+        session.get(URL_INDEX, headers=HEADERS, timeout=15)
+        print("   OK - Sessão obtida")
+        return session
+    except Exception as e:
+        print(f"   ERRO ao obter sessão: {e}")
+        return None
+
+
+def coletar_dados_para_ano(ano: int, indice: Optional[str] = None,
+                           session: Optional[requests.Session] = None) -> pd.DataFrame:
+    """Coleta dados de todas as combinações (raça, fase, sexo) para um único ano. Adiciona coluna Ano.
+    Com indice, coleta esse nu_indice_cri e adiciona a coluna Indice; com session, reaproveita a sessão.
+    As combinações cuja requisição ou parsing falhou ficam em df.attrs["combinacoes_falhas"]."""
+    RACAS, SEXOS, _ = dimensoes()
+    fases = fases_indice(indice)
     print("\n" + "=" * 80)
-    print(f"COLETANDO DADOS DO ANO {ano}")
+    print(f"COLETANDO DADOS DO ANO {ano}" + (f" - ÍNDICE {indice}" if indice else ""))
     print("=" * 80)
     # Mostrar payload usado neste ano (exemplo com primeira combinação)
     payload_ano = criar_payload(
         next(iter(RACAS.keys())),
-        next(iter(FASES_IDADE.keys())),
+        fases[0],
         next(iter(SEXOS.keys())),
         ano,
+        indice or "1",
     )
     print(f"\nPayload para ano {ano}:")
     for k, v in sorted(payload_ano.items()):
         print(f"  {k}: {v}")
-    session = requests.Session()
-    print("\n1. Obtendo sessão do servidor...")
-    try:
-        session.get(URL_INDEX, headers=HEADERS, timeout=15)
-        print("   OK - Sessão obtida")
-    except Exception as e:
-        print(f"   ERRO ao obter sessão: {e}")
+    session = session or obter_sessao()
+    if session is None:
         return pd.DataFrame()
     todos_dataframes = []
-    total_combinacoes = len(RACAS) * len(FASES_IDADE) * len(SEXOS)
+    falhas = []
+    total_combinacoes = len(RACAS) * len(fases) * len(SEXOS)
     combinacao_atual = 0
     print(f"\n2. Coletando dados de {total_combinacoes} combinações para {ano}...")
     print("-" * 80)
     for raca_codigo in RACAS.keys():
-        for fase_idade in FASES_IDADE.keys():
+        for fase_idade in fases:
             for sexo_codigo in SEXOS.keys():
                 combinacao_atual += 1
                 print(f"\n[{combinacao_atual}/{total_combinacoes}] Processando combinação...")
-                html_content = fazer_requisicao(session, raca_codigo, fase_idade, sexo_codigo, ano)
+                html_content = fazer_requisicao(session, raca_codigo, fase_idade, sexo_codigo, ano,
+                                                indice=indice or "1")
                 if html_content is None:
                     print("      AVISO: Não foi possível obter dados desta combinação")
+                    falhas.append((raca_codigo, fase_idade, sexo_codigo))
+                    continue
+                df = processar_html_para_dataframe(html_content, indice or "1")
+                if df is None:
+                    falhas.append((raca_codigo, fase_idade, sexo_codigo))
                     continue
-                df = processar_html_para_dataframe(html_content)
-                if df is None or df.empty:
+                if df.empty:
                     print("      AVISO: Nenhum dado encontrado nesta combinação")
                     continue
-                raca_nome = RACAS[raca_codigo]
-                sexo_nome = SEXOS[sexo_codigo]
-                _, _, fase_nome = FASES_IDADE[fase_idade]
-                df["Ano"] = ano
-                df["Raca_Codigo"] = raca_codigo
-                df["Raca_Nome"] = raca_nome
-                df["Sexo_Codigo"] = sexo_codigo
-                df["Sexo_Nome"] = sexo_nome
-                df["Fase_Idade"] = fase_idade
-                df["Fase_Nome"] = fase_nome
-                todos_dataframes.append(df)
+                todos_dataframes.append(anotar_combinacao(df, ano, raca_codigo, fase_idade, sexo_codigo, indice))
                 print(f"      OK - {len(df)} municípios encontrados")
                 time.sleep(1)
     print(f"\n3. Consolidando dados do ano {ano}...")
@@ -274,7 +358,9 @@ def coletar_dados_para_ano(ano: int) -> pd.DataFrame:
         print("   ERRO: Nenhum dado foi coletado!")
         return pd.DataFrame()
     df_final = pd.concat(todos_dataframes, ignore_index=True)
-    print(f"   OK - Total de {len(df_final)} registros para {ano}")
+    df_final.attrs["combinacoes_falhas"] = falhas
+    print(f"   OK - Total de {len(df_final)} registros para {ano}"
+          + (f" ({len(falhas)} combinações com falha)" if falhas else ""))
     return df_final
 
 
@@ -282,27 +368,77 @@ def coletar_dados_para_ano(ano: int) -> pd.DataFrame:
 # FUNÇÃO PRINCIPAL
 # ============================================================================
 
-def main():
-    """Coleta por ano e salva um CSV por ano (com coluna Ano)."""
+def salvar_ano(df: pd.DataFrame, ano: int, dir_saida: str = ".", dir_deltas: Optional[str] = None,
+               dir_estrela: Optional[str] = None, indice: Optional[str] = None) -> None:
+    """Salva o CSV do ano; opcionalmente grava o delta contra o anterior e a saída em estrela.
+    Com indice, o CSV vai para a partição <dir_saida>/indice_<indice>/.
+    Com dir_deltas, se alguma combinação falhou (df.attrs["combinacoes_falhas"]) e já existe
+    CSV do ano, ele é mantido e nenhum delta é gravado: as linhas dessas combinações
+    apareceriam como deletes. Sem CSV anterior, o delta é a carga inicial (só inserts)."""
+    if indice is not None:
+        dir_saida = os.path.join(dir_saida, f"indice_{indice}")
+        dir_deltas = os.path.join(dir_deltas, f"indice_{indice}") if dir_deltas else None
+        if indice != "1":
+            # O esquema estrela usa as classes do índice 1 (Peso x Idade)
+            dir_estrela = None
+    os.makedirs(dir_saida, exist_ok=True)
+    csv_output = os.path.join(dir_saida, f"dados_sisvan_racas_idades_{ano}.csv")
+    print(f"\n4. Salvando {csv_output} ({len(df)} registros, coluna Ano={ano})")
+    falhas = df.attrs.get("combinacoes_falhas", [])
+    if dir_deltas and falhas and os.path.exists(csv_output):
+        print(f"   AVISO: {len(falhas)} combinação(ões) falharam; {csv_output} mantido e delta não gravado. "
+              f"Recolete o ano.")
+        return
+    try:
+        # Grava ao lado e troca de uma vez: quem lê o CSV (servidor.py) nunca vê um arquivo pela metade
+        csv_novo = csv_output + ".novo"
+        salvar_csv_powerbi(df, csv_novo)
+        if dir_deltas:
+            from cdc import registrar_delta
+            registrar_delta(csv_output, csv_novo, dir_deltas, ano)
+        os.replace(csv_novo, csv_output)
+        print(f"   OK - {csv_output} salvo.")
+        if dir_estrela:
+            from estrela import gerar_estrela
+            gerar_estrela([csv_output], dir_estrela)
+    except Exception as e:
+        print(f"   ERRO ao salvar: {e}")
+
+
+def main(ano_mais_recente: int = ANO_MAIS_RECENTE, ano_mais_antigo: int = ANO_MAIS_ANTIGO,
+         dir_saida: str = ".", dir_deltas: Optional[str] = None, dir_estrela: Optional[str] = None,
+         fetchers: int = 0, parsers: Optional[int] = None, indices: Optional[List[str]] = None):
+    """Coleta por ano e salva um CSV por ano (com coluna Ano) em dir_saida.
+    Com dir_deltas, grava também o delta (inserts/updates/deletes) contra o CSV anterior do ano.
+    Com dir_estrela, grava também o fato do ano e as dimensões em esquema estrela (estrela.py).
+    Com fetchers > 0, coleta em pipeline (requisições em threads, parsing em processos; pipeline.py).
+    Com indices (nu_indice_cri), coleta todos na mesma execução e grava em <dir_saida>/indice_<N>/."""
+    RACAS, SEXOS, FASES_IDADE = dimensoes()
     print("=" * 80)
     print("PROCESSADOR DE DADOS SISVAN - COLETA POR ANO")
     print("=" * 80)
     print("\nConfiguração:")
-    print(f"  - Anos: {ANO_MAIS_RECENTE} → {ANO_MAIS_ANTIGO} (começa em 2025 e desce)")
+    print(f"  - Anos: {ano_mais_recente} → {ano_mais_antigo} (começa no mais recente e desce)")
     print(f"  - Raças: {len(RACAS)} | Sexos: {len(SEXOS)} | Fases de Idade: {len(FASES_IDADE)}")
-    print(f"  - Total de combinações por ano: {len(RACAS) * len(FASES_IDADE) * len(SEXOS)}")
-    for ano in range(ANO_MAIS_RECENTE, ANO_MAIS_ANTIGO - 1, -1):
-        df = coletar_dados_para_ano(ano)
+    if indices:
+        print(f"  - Índices: {', '.join(f'{i}-{indices_cri()[i][0]}' for i in indices)}")
+    n_fases = sum(len(fases_indice(i)) for i in indices or [None])
+    print(f"  - Total de combinações por ano: {len(RACAS) * n_fases * len(SEXOS)}")
+    anos = list(range(ano_mais_recente, ano_mais_antigo - 1, -1))
+    if fetchers > 0:
+        from pipeline import coletar_em_pipeline
+        resultados = coletar_em_pipeline(anos, fetchers, parsers, indices=indices)
+    elif indices:
+        session = obter_sessao()
+        resultados = ((ano, indice, coletar_dados_para_ano(ano, indice, session) if session else pd.DataFrame())
+                      for ano in anos for indice in indices)
+    else:
+        resultados = ((ano, None, coletar_dados_para_ano(ano)) for ano in anos)
+    for ano, indice, df in resultados:
         if df.empty:
-            print(f"\n   AVISO: Nenhum dado para {ano}, pulando.")
+            print(f"\n   AVISO: Nenhum dado para {ano}" + (f" (índice {indice})" if indice else "") + ", pulando.")
             continue
-        csv_output = f"dados_sisvan_racas_idades_{ano}.csv"
-        print(f"\n4. Salvando {csv_output} ({len(df)} registros, coluna Ano={ano})")
-        try:
-            salvar_csv_powerbi(df, csv_output)
-            print(f"   OK - {csv_output} salvo.")
-        except Exception as e:
-            print(f"   ERRO ao salvar: {e}")
+        salvar_ano(df, ano, dir_saida, dir_deltas, dir_estrela, indice)
     print(f"\n{'=' * 80}")
     print("PROCESSAMENTO CONCLUÍDO!")
     print(f"{'=' * 80}")
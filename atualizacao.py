@@ -0,0 +1,105 @@
+"""
+Atualização de um subconjunto de municípios nos CSVs por ano já gravados.
+
+Quando uma secretaria corrige dados de poucos municípios, não é preciso recoletar o ano:
+as requisições usam coMunicipioIbge=<código> (como em app_test.py) e as linhas
+retornadas substituem, no próprio CSV do ano, as linhas de mesma chave
+(Codigo_IBGE, Raca_Codigo, Sexo_Codigo, Fase_Idade[, Indice]).
+
+Planejamento: cada código custa uma requisição por combinação; acima de `limite`
+códigos, volta-se à requisição com todos os municípios ("99") e só as linhas dos
+códigos pedidos são aproveitadas.
+"""
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config import dimensoes, fases_indice
+
+COLUNAS_CHAVE = ["Codigo_IBGE", "Raca_Codigo", "Sexo_Codigo", "Fase_Idade", "Indice"]
+
+
+def planejar_municipios(codigos: List[str], limite: int = 5) -> List[str]:
+    """Valores de coMunicipioIbge a requisitar por combinação: os próprios códigos ou "99"."""
+    if len(codigos) > limite:
+        return ["99"]
+    return list(codigos)
+
+
+def substituir_linhas(existente: pd.DataFrame, novas: pd.DataFrame) -> pd.DataFrame:
+    """Troca as linhas de `existente` com a mesma chave das `novas`, mantendo ordem e colunas;
+    chaves inexistentes são acrescentadas no fim."""
+    chave = [c for c in COLUNAS_CHAVE if c in existente.columns]
+    colunas = list(existente.columns)
+    base = existente.set_index(chave)
+    novas = novas[colunas].astype(str).set_index(chave)
+    base.update(novas)
+    extras = novas.loc[novas.index.difference(base.index)]
+    return pd.concat([base, extras]).reset_index()[colunas]
+
+
+def atualizar_municipios(codigos: List[str], anos: List[int], dir_dados: str, limite: int = 5,
+                         indice: Optional[str] = None, dir_deltas: Optional[str] = None,
+                         pausa: float = 1.0) -> Tuple[List[int], Dict[int, List[Tuple[str, str, str, str]]]]:
+    """Reconsulta só os municípios `codigos` e regrava os CSVs de `anos` em dir_dados.
+    indice: partição indice_<N> (coleta --indices); None = CSVs padrão do índice 1.
+    Um ano com requisição ou parsing falho (raça, fase, sexo, alvo) não é regravado,
+    como em salvar_ano com combinacoes_falhas. Retorna (anos atualizados, falhas por ano)."""
+    import ETL_criança
+
+    RACAS, SEXOS, _ = dimensoes()
+    fases = fases_indice(indice)
+    codigos = sorted(set(codigos))
+    alvos = planejar_municipios(codigos, limite)
+    n_combinacoes = len(RACAS) * len(fases) * len(SEXOS)
+    print(f"Atualizando {len(codigos)} município(s) em {len(anos)} ano(s): "
+          f"{'todos os municípios (99)' if alvos == ['99'] else 'por município'} | "
+          f"{len(alvos) * n_combinacoes} requisições por ano")
+
+    session = ETL_criança.obter_sessao()
+    if session is None:
+        return [], {}
+    atualizados = []
+    falhas_por_ano: Dict[int, List[Tuple[str, str, str, str]]] = {}
+    for ano in anos:
+        csv_ano = os.path.join(dir_dados, f"dados_sisvan_racas_idades_{ano}.csv")
+        if not os.path.exists(csv_ano):
+            print(f"\n   AVISO: {csv_ano} não existe; use a coleta completa para este ano.")
+            continue
+        partes = []
+        falhas = []
+        for raca_codigo in RACAS:
+            for fase_idade in fases:
+                for sexo_codigo in SEXOS:
+                    for alvo in alvos:
+                        html = ETL_criança.fazer_requisicao(session, raca_codigo, fase_idade, sexo_codigo, ano,
+                                                            indice=indice or "1", municipio=alvo)
+                        if pausa:
+                            time.sleep(pausa)
+                        if html is None:
+                            falhas.append((raca_codigo, fase_idade, sexo_codigo, alvo))
+                            continue
+                        df = ETL_criança.processar_html_para_dataframe(html, indice or "1")
+                        if df is None:
+                            falhas.append((raca_codigo, fase_idade, sexo_codigo, alvo))
+                            continue
+                        df = df[df["Codigo_IBGE"].isin(codigos)]
+                        if not df.empty:
+                            partes.append(ETL_criança.anotar_combinacao(
+                                df.copy(), ano, raca_codigo, fase_idade, sexo_codigo, indice))
+        if falhas:
+            falhas_por_ano[ano] = falhas
+            print(f"\n   AVISO: {len(falhas)} requisição(ões) falharam em {ano}, CSV mantido. "
+                  f"(raça, fase, sexo, município): {falhas}")
+            continue
+        if not partes:
+            print(f"\n   AVISO: Nenhuma linha retornada para {ano}, CSV mantido.")
+            continue
+        existente = pd.read_csv(csv_ano, sep=";", encoding="utf-8-sig", dtype=str, keep_default_na=False)
+        novas = pd.concat(partes, ignore_index=True)
+        print(f"\n   {ano}: {len(novas)} linha(s) de {novas['Codigo_IBGE'].nunique()} município(s)")
+        ETL_criança.salvar_ano(substituir_linhas(existente, novas), ano, dir_dados, dir_deltas)
+        atualizados.append(ano)
+    return atualizados, falhas_por_ano
@@ -0,0 +1,94 @@
+"""
+Change-data-capture entre coletas: compara o CSV anterior de um ano com o recém-coletado
+e grava apenas as linhas inseridas, alteradas e removidas, mais um changelog.
+
+Chave da linha: Codigo_IBGE + dimensões presentes no arquivo (Ano, Raca_Codigo,
+Sexo_Codigo, Fase_Idade, Indice). Arquivos gerados em <dir_deltas>/<ano>/:
+    <carimbo>_inserts.csv, <carimbo>_updates.csv, <carimbo>_deletes.csv
+e uma linha JSON por execução em <dir_deltas>/changelog.jsonl.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from config import ler_linhas
+
+# Colunas que, junto com Codigo_IBGE, identificam uma linha (usadas as que existirem no CSV)
+COLUNAS_DIMENSAO = ["Ano", "Raca_Codigo", "Sexo_Codigo", "Fase_Idade", "Indice"]
+
+
+def colunas_chave(colunas: List[str]) -> List[str]:
+    """Codigo_IBGE + dimensões presentes em `colunas`."""
+    return ["Codigo_IBGE"] + [c for c in COLUNAS_DIMENSAO if c in colunas]
+
+
+def indexar(linhas: List[Dict[str, str]], chave: List[str]) -> Dict[Tuple[str, ...], Dict[str, str]]:
+    """Indexa as linhas pela tupla de colunas-chave."""
+    return {tuple(row[c] for c in chave): row for row in linhas}
+
+
+def calcular_delta(anteriores: List[Dict[str, str]], novas: List[Dict[str, str]]):
+    """Retorna (chave, inserts, updates, deletes). updates traz a linha nova e, em
+    Colunas_Alteradas, os nomes das colunas que mudaram (separados por |)."""
+    colunas = list(novas[0].keys()) if novas else list(anteriores[0].keys()) if anteriores else []
+    chave = colunas_chave(colunas)
+    antes = indexar(anteriores, chave)
+    depois = indexar(novas, chave)
+    inserts = [row for k, row in depois.items() if k not in antes]
+    deletes = [row for k, row in antes.items() if k not in depois]
+    updates = []
+    for k, row in depois.items():
+        anterior = antes.get(k)
+        if anterior is None or anterior == row:
+            continue
+        alteradas = [c for c in row if anterior.get(c) != row[c]]
+        updates.append(dict(row, Colunas_Alteradas="|".join(alteradas)))
+    return chave, inserts, updates, deletes
+
+
+def _gravar(path: str, colunas: List[str], linhas: List[Dict[str, str]]) -> None:
+    """Grava no mesmo formato dos ETLs (separador ;, UTF-8 com BOM), mesmo se vazio."""
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=colunas, delimiter=";")
+        writer.writeheader()
+        writer.writerows(linhas)
+
+
+def registrar_delta(csv_anterior: str, csv_novo: str, dir_deltas: str, ano: int) -> Dict:
+    """Compara dois CSVs do mesmo ano, grava os arquivos de delta e acrescenta ao changelog.
+    Sem CSV anterior (primeira coleta do ano), o delta é a carga inicial: tudo insert."""
+    existia = os.path.exists(csv_anterior)
+    anteriores = list(ler_linhas(csv_anterior)) if existia else []
+    novas = list(ler_linhas(csv_novo))
+    chave, inserts, updates, deletes = calcular_delta(anteriores, novas)
+    colunas = list(novas[0].keys()) if novas else list(anteriores[0].keys()) if anteriores else chave
+
+    carimbo = datetime.now().strftime("%Y%m%dT%H%M%S")
+    dir_ano = os.path.join(dir_deltas, str(ano))
+    os.makedirs(dir_ano, exist_ok=True)
+    arquivos = {}
+    for tipo, linhas, cols in (("inserts", inserts, colunas),
+                               ("updates", updates, colunas + ["Colunas_Alteradas"]),
+                               ("deletes", deletes, colunas)):
+        path = os.path.join(dir_ano, f"{carimbo}_{tipo}.csv")
+        _gravar(path, cols, linhas)
+        arquivos[tipo] = os.path.relpath(path, dir_deltas)
+
+    registro = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "ano": ano,
+        "anterior": os.path.basename(csv_anterior) if existia else None,
+        "chave": chave,
+        "linhas_anteriores": len(anteriores),
+        "linhas_novas": len(novas),
+        "inserts": len(inserts),
+        "updates": len(updates),
+        "deletes": len(deletes),
+        "arquivos": arquivos,
+    }
+    with open(os.path.join(dir_deltas, "changelog.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    print(f"   Delta {ano}: {len(inserts)} inserts | {len(updates)} updates | {len(deletes)} deletes")
+    return registro
@@ -0,0 +1,86 @@
+"""
+Configuração compartilhada dos scripts SISVAN.
+utils.json é lido sob demanda (uma única vez por processo), e não na importação.
+Inclui também os leitores dos CSVs gerados pelos ETLs, usados pelo CLI e pelos módulos.
+"""
+import csv
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+UTILS_JSON = os.path.join(BASE_DIR, "utils.json")
+DIR_CRIANCAS = os.path.join(BASE_DIR, "Crianças")
+CSV_ADULTO = os.path.join(BASE_DIR, "dados_sisvan_adulto.csv")
+# Quantidades (inteiras) dos CSVs de crianças do índice 1 (Peso x Idade)
+COLUNAS_QTD = ["MuitoBaixo_Qtd", "Baixo_Qtd", "Adequado_Qtd", "Elevado_Qtd", "Total"]
+
+
+@lru_cache(maxsize=None)
+def carregar_utils() -> Dict:
+    """Lê utils.json na primeira chamada; as chamadas seguintes reutilizam o resultado."""
+    with open(UTILS_JSON, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def dimensoes() -> Tuple[Dict[str, str], Dict[str, str], Dict[str, Tuple[int, int, str]]]:
+    """Retorna (RACAS, SEXOS, FASES_IDADE); FASES_IDADE com valores (inicio, fim, nome)."""
+    utils = carregar_utils()
+    fases = {k: (v[0], v[1], v[2]) for k, v in utils["FASES_IDADE"].items()}
+    return utils["RACAS"], utils["SEXOS"], fases
+
+
+@lru_cache(maxsize=None)
+def indices_cri() -> Dict[str, Tuple[str, Dict[str, str], List[str]]]:
+    """Índices antropométricos de crianças (nu_indice_cri): código -> (nome, classes, fases).
+    classes: prefixo da coluna -> rótulo da classe no cabeçalho do relatório (minúsculo, sem
+    acento); união das classes de todas as fases (IMC x Idade muda de classes aos 5 anos).
+    fases: Fase_Idade para as quais o SISVAN publica o índice."""
+    return {k: (v[0], v[1], v[2]) for k, v in carregar_utils()["INDICES_CRI"].items()}
+
+
+def fases_indice(indice: Optional[str] = None) -> List[str]:
+    """Fases de idade coletadas para o índice (None = coleta padrão do índice 1: todas)."""
+    if indice is None:
+        return list(dimensoes()[2])
+    return list(indices_cri()[indice][2])
+
+
+def caminho_ano(ano: int) -> str:
+    """CSV de crianças de um ano (Crianças/dados_sisvan_racas_idades_<ano>.csv)."""
+    return os.path.join(DIR_CRIANCAS, f"dados_sisvan_racas_idades_{ano}.csv")
+
+
+def dir_dados_indice(indice: Optional[str] = None) -> str:
+    """Diretório dos CSVs por ano: Crianças/ ou a partição Crianças/indice_<N>/ (coleta --indices)."""
+    return os.path.join(DIR_CRIANCAS, f"indice_{indice}") if indice else DIR_CRIANCAS
+
+
+def ano_do_arquivo(path: str) -> Optional[int]:
+    """Ano no nome de um CSV por ano (..._<ano>.csv); None se não houver."""
+    match = re.search(r"(\d{4})\.csv$", path)
+    return int(match.group(1)) if match else None
+
+
+def ler_linhas(path: str) -> Iterator[Dict[str, str]]:
+    """Lê um CSV gerado pelos ETLs (separador ;, UTF-8 com BOM) linha a linha, sem pandas."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from csv.DictReader(f, delimiter=";")
+
+
+def para_int(valor: str) -> Optional[int]:
+    """Converte quantidade no formato do SISVAN ("1.065" = 1065) para int; None se inválida."""
+    valor = valor.replace(".", "").strip()
+    return int(valor) if valor.isdigit() else None
+
+
+def para_float(valor: str) -> Optional[float]:
+    """Converte percentual gravado pelos ETLs ("15,47" ou "-") para float; None se vazio/"-"."""
+    valor = valor.replace(",", ".").strip()
+    try:
+        return float(valor)
+    except ValueError:
+        return None
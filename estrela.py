@@ -0,0 +1,86 @@
+"""
+Saída em esquema estrela para BI: fato com chaves inteiras + quantidades, e dimensões
+geradas a partir de utils.json (raça, sexo, fase) e dos relatórios coletados (município, ano).
+
+Arquivos em <dir_saida>/:
+    fato_<ano>.csv      Ano;Codigo_IBGE;Raca_Id;Sexo_Id;Fase_Id;MuitoBaixo_Qtd;...;Total
+    dim_municipio.csv   Codigo_IBGE;Municipio;Codigo_UF;UF;Regiao
+    dim_raca.csv        Raca_Id;Raca_Codigo;Raca_Nome
+    dim_sexo.csv        Sexo_Id;Sexo_Codigo;Sexo_Nome
+    dim_fase.csv        Fase_Id;Idade_Inicio;Idade_Fim;Fase_Nome
+    dim_ano.csv         Ano
+Os percentuais não são gravados no fato: são Qtd / Total e podem ser medidas no BI.
+"""
+import csv
+import os
+from typing import Dict, List
+
+from config import COLUNAS_QTD, ano_do_arquivo, dimensoes, ler_linhas, para_int
+
+COLUNAS_FATO = ["Ano", "Codigo_IBGE", "Raca_Id", "Sexo_Id", "Fase_Id"] + COLUNAS_QTD
+COLUNAS_MUNICIPIO = ["Codigo_IBGE", "Municipio", "Codigo_UF", "UF", "Regiao"]
+
+
+def ids_sexo() -> Dict[str, int]:
+    """Sexo_Codigo -> Sexo_Id (1, 2, ... na ordem de utils.json)."""
+    _, sexos, _ = dimensoes()
+    return {codigo: i for i, codigo in enumerate(sexos, start=1)}
+
+
+def _gravar(path: str, colunas: List[str], linhas) -> None:
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(colunas)
+        writer.writerows(linhas)
+
+
+def gravar_fato(csv_ano: str, path_fato: str, municipios: Dict[str, List[str]]) -> int:
+    """Converte um CSV de crianças (formato largo) em fato; acumula municípios vistos em `municipios`."""
+    sexo_id = ids_sexo()
+    linhas = []
+    for row in ler_linhas(csv_ano):
+        municipios.setdefault(row["Codigo_IBGE"], [row[c] for c in COLUNAS_MUNICIPIO])
+        linhas.append([
+            int(row["Ano"]), int(row["Codigo_IBGE"]), int(row["Raca_Codigo"]),
+            sexo_id[row["Sexo_Codigo"]], int(row["Fase_Idade"]),
+        ] + [para_int(row[c]) for c in COLUNAS_QTD])
+    _gravar(path_fato, COLUNAS_FATO, linhas)
+    return len(linhas)
+
+
+def gravar_dimensoes(dir_saida: str, municipios: Dict[str, List[str]], anos: List[int]) -> None:
+    """Grava as dimensões; dim_municipio é mesclada com a já existente em dir_saida."""
+    racas, sexos, fases = dimensoes()
+    path_municipio = os.path.join(dir_saida, "dim_municipio.csv")
+    if os.path.exists(path_municipio):
+        for row in ler_linhas(path_municipio):
+            municipios.setdefault(row["Codigo_IBGE"], [row[c] for c in COLUNAS_MUNICIPIO])
+    _gravar(path_municipio, COLUNAS_MUNICIPIO, [municipios[k] for k in sorted(municipios)])
+    _gravar(os.path.join(dir_saida, "dim_raca.csv"), ["Raca_Id", "Raca_Codigo", "Raca_Nome"],
+            [[int(codigo), codigo, nome] for codigo, nome in racas.items()])
+    _gravar(os.path.join(dir_saida, "dim_sexo.csv"), ["Sexo_Id", "Sexo_Codigo", "Sexo_Nome"],
+            [[i, codigo, sexos[codigo]] for codigo, i in ids_sexo().items()])
+    _gravar(os.path.join(dir_saida, "dim_fase.csv"), ["Fase_Id", "Idade_Inicio", "Idade_Fim", "Fase_Nome"],
+            [[int(codigo), inicio, fim, nome] for codigo, (inicio, fim, nome) in fases.items()])
+    path_ano = os.path.join(dir_saida, "dim_ano.csv")
+    if os.path.exists(path_ano):
+        anos = list(anos) + [int(row["Ano"]) for row in ler_linhas(path_ano)]
+    _gravar(path_ano, ["Ano"], [[ano] for ano in sorted(set(anos))])
+
+
+def gerar_estrela(arquivos: List[str], dir_saida: str) -> None:
+    """Gera fato_<ano>.csv para cada CSV de crianças e (re)grava as dimensões."""
+    os.makedirs(dir_saida, exist_ok=True)
+    municipios: Dict[str, List[str]] = {}
+    anos = []
+    for path in arquivos:
+        ano = ano_do_arquivo(path)
+        if ano is None:
+            print(f"  AVISO: ano não identificado em {path}, pulando.")
+            continue
+        path_fato = os.path.join(dir_saida, f"fato_{ano}.csv")
+        n = gravar_fato(path, path_fato, municipios)
+        anos.append(ano)
+        print(f"  {os.path.basename(path_fato)}: {n} linhas")
+    gravar_dimensoes(dir_saida, municipios, anos)
+    print(f"  Dimensões gravadas em {dir_saida} ({len(municipios)} municípios)")
@@ -0,0 +1,223 @@
+"""
+Coleta de crianças em pipeline: requisições → parsing → gravação, com filas limitadas.
+
+    [fetchers: threads, 1 sessão cada] --q_html--> [parsers: ProcessPoolExecutor]
+        --q_parseados--> [escritor único, na ordem do plano: ano a ano, índice a índice]
+
+- q_html tem tamanho máximo: se o parsing atrasar, as threads de requisição bloqueiam.
+- No máximo `parsers * 2` HTMLs ficam em parsing ao mesmo tempo; a vaga só é liberada
+  quando o escritor consome o resultado, então um escritor lento segura o parsing.
+- Se o despacho para o pool falhar (ex.: BrokenProcessPool), o despachante põe um marcador
+  de parada em q_parseados e o escritor interrompe a coleta com erro, em vez de esperar
+  para sempre.
+- Os processos de parsing usam "spawn": com fork, um filho criado depois que as threads
+  de requisição já estão rodando poderia herdar um lock preso (stdout, urllib3).
+- Uma thread de monitoramento amostra a profundidade de cada estágio; o resumo é
+  impresso no fim (máximo e média por fila, vazão do parsing).
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import requests
+
+from config import dimensoes, fases_indice
+
+Tarefa = Tuple[int, int, Optional[str], str, str, str]  # (seq, ano, indice, raca, fase, sexo)
+
+
+def planejar(anos: List[int], indices: Optional[List[str]] = None) -> List[Tarefa]:
+    """Todas as combinações (ano, índice, raça, fase, sexo) na mesma ordem da coleta sequencial.
+    Sem indices, o índice fica None (coleta padrão do índice 1, sem coluna Indice)."""
+    RACAS, SEXOS, _ = dimensoes()
+    tarefas = []
+    for ano in anos:
+        for indice in indices or [None]:
+            for raca_codigo in RACAS:
+                for fase_idade in fases_indice(indice):
+                    for sexo_codigo in SEXOS:
+                        tarefas.append((len(tarefas), ano, indice, raca_codigo, fase_idade, sexo_codigo))
+    return tarefas
+
+
+class Metricas:
+    """Amostras de profundidade por estágio (fila de tarefas, q_html, em parsing, q_parseados)."""
+
+    def __init__(self):
+        self.amostras: Dict[str, List[int]] = {}
+        self.contadores = {"requisicoes": 0, "falhas": 0, "parseados": 0, "em_parse": 0}
+        self.inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def somar(self, nome: str, valor: int = 1) -> None:
+        with self._lock:
+            self.contadores[nome] += valor
+
+    def amostrar(self, profundidades: Dict[str, int]) -> None:
+        for nome, valor in profundidades.items():
+            self.amostras.setdefault(nome, []).append(valor)
+
+    def resumo(self) -> str:
+        duracao = time.perf_counter() - self.inicio
+        linhas = [f"   Pipeline: {duracao:.1f}s | {self.contadores['requisicoes']} requisições "
+                  f"({self.contadores['falhas']} falhas) | {self.contadores['parseados']} parseados "
+                  f"({self.contadores['parseados'] / duracao if duracao else 0:.1f}/s)"]
+        for nome, valores in self.amostras.items():
+            linhas.append(f"   Fila {nome:<12} máx {max(valores):>4} | média {sum(valores) / len(valores):>6.1f}")
+        return "\n".join(linhas)
+
+
+def _nova_sessao() -> requests.Session:
+    from ETL_criança import HEADERS, URL_INDEX
+    session = requests.Session()
+    session.get(URL_INDEX, headers=HEADERS, timeout=15)
+    return session
+
+
+def _buscar_padrao(session: requests.Session, tarefa: Tarefa) -> Optional[str]:
+    from ETL_criança import fazer_requisicao
+    _, ano, indice, raca_codigo, fase_idade, sexo_codigo = tarefa
+    return fazer_requisicao(session, raca_codigo, fase_idade, sexo_codigo, ano, indice=indice or "1")
+
+
+def _parsear(html: str, indice: str) -> Optional[pd.DataFrame]:
+    from ETL_criança import processar_html_para_dataframe
+    return processar_html_para_dataframe(html, indice)
+
+
+def coletar_em_pipeline(anos: List[int], fetchers: int = 4, parsers: Optional[int] = None,
+                        profundidade: int = 16, pausa: float = 1.0, intervalo_metricas: float = 1.0,
+                        buscar: Callable[[requests.Session, Tarefa], Optional[str]] = _buscar_padrao,
+                        nova_sessao: Callable[[], requests.Session] = _nova_sessao,
+                        indices: Optional[List[str]] = None
+                        ) -> Iterator[Tuple[int, Optional[str], pd.DataFrame]]:
+    """Gera (ano, índice, DataFrame) na ordem de `anos` (e de `indices`), como
+    coletar_dados_para_ano faria (inclusive df.attrs["combinacoes_falhas"]).
+    Todos os índices compartilham as mesmas sessões e filas.
+
+    fetchers: threads de requisição (uma sessão HTTP cada); pausa: espera entre requisições
+    de uma mesma thread; parsers: processos de parsing (padrão: núcleos da máquina);
+    profundidade: tamanho máximo da fila de HTMLs aguardando parsing.
+    """
+    from ETL_criança import anotar_combinacao
+
+    parsers = parsers or os.cpu_count() or 1
+    tarefas = planejar(anos, indices)
+    # Partições de saída (ano, índice) na ordem do plano
+    particoes = [(ano, indice) for ano in anos for indice in indices or [None]]
+    por_particao = {p: sum(1 for t in tarefas if (t[1], t[2]) == p) for p in particoes}
+    metricas = Metricas()
+    q_tarefas: "queue.Queue[Optional[Tarefa]]" = queue.Queue()
+    q_html: "queue.Queue" = queue.Queue(maxsize=profundidade)
+    q_parseados: "queue.Queue" = queue.Queue()
+    vagas_parse = threading.Semaphore(parsers * 2)
+    fim = threading.Event()
+    erros: List[BaseException] = []
+    for tarefa in tarefas:
+        q_tarefas.put(tarefa)
+    for _ in range(fetchers):
+        q_tarefas.put(None)
+
+    print(f"\nPipeline: {len(tarefas)} combinações | {fetchers} fetchers | {parsers} parsers | "
+          f"fila HTML {profundidade}")
+
+    def fetcher() -> None:
+        try:
+            session = nova_sessao()
+        except Exception as e:
+            print(f"   ERRO ao obter sessão: {e}")
+            session = None
+        while True:
+            tarefa = q_tarefas.get()
+            if tarefa is None:
+                break
+            try:
+                html = buscar(session, tarefa) if session is not None else None
+            except Exception as e:
+                print(f"      ERRO na requisição: {e}")
+                html = None
+            metricas.somar("requisicoes")
+            if html is None:
+                metricas.somar("falhas")
+            q_html.put((tarefa, html))
+            if session is not None and pausa:
+                time.sleep(pausa)
+        q_html.put(None)
+
+    def despachante(pool: ProcessPoolExecutor) -> None:
+        ativos = fetchers
+        try:
+            while ativos:
+                item = q_html.get()
+                if item is None:
+                    ativos -= 1
+                    continue
+                tarefa, html = item
+                vagas_parse.acquire()
+                if html is None:
+                    q_parseados.put((tarefa, None))
+                    continue
+                metricas.somar("em_parse")
+                futuro = pool.submit(_parsear, html, tarefa[2] or "1")
+
+                def concluido(f, tarefa=tarefa):
+                    metricas.somar("em_parse", -1)
+                    metricas.somar("parseados")
+                    q_parseados.put((tarefa, None if f.exception() else f.result()))
+
+                futuro.add_done_callback(concluido)
+        except Exception as e:
+            # Sem despachante o escritor esperaria para sempre: marcador de parada
+            erros.append(e)
+            q_parseados.put(None)
+
+    def monitor() -> None:
+        while not fim.wait(intervalo_metricas):
+            metricas.amostrar({"tarefas": q_tarefas.qsize(), "html": q_html.qsize(),
+                               "em_parse": metricas.contadores["em_parse"], "parseados": q_parseados.qsize()})
+
+    with ProcessPoolExecutor(max_workers=parsers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        threads = [threading.Thread(target=fetcher, daemon=True) for _ in range(fetchers)]
+        threads.append(threading.Thread(target=despachante, args=(pool,), daemon=True))
+        threads.append(threading.Thread(target=monitor, daemon=True))
+        for t in threads:
+            t.start()
+
+        # Escritor: reordena e entrega cada partição (ano, índice) completa na ordem do plano
+        pendentes: Dict[Tuple[int, Optional[str]], List[Tuple[int, pd.DataFrame]]] = {p: [] for p in particoes}
+        falhas: Dict[Tuple[int, Optional[str]], List[Tuple[str, str, str]]] = {p: [] for p in particoes}
+        faltam = dict(por_particao)
+        proximo = 0
+        for _ in range(len(tarefas)):
+            item = q_parseados.get()
+            if item is None:
+                fim.set()
+                print(metricas.resumo())
+                raise RuntimeError(f"Pipeline interrompido: falha ao enviar HTML para o parsing "
+                                   f"({erros[0]!r}); partições ainda não gravadas foram descartadas") from erros[0]
+            tarefa, df = item
+            vagas_parse.release()
+            seq, ano, indice, raca_codigo, fase_idade, sexo_codigo = tarefa
+            faltam[(ano, indice)] -= 1
+            if df is None:
+                falhas[(ano, indice)].append((raca_codigo, fase_idade, sexo_codigo))
+            elif not df.empty:
+                df = anotar_combinacao(df, ano, raca_codigo, fase_idade, sexo_codigo, indice)
+                pendentes[(ano, indice)].append((seq, df))
+            while proximo < len(particoes) and faltam[particoes[proximo]] == 0:
+                pronta = particoes[proximo]
+                partes = [d for _, d in sorted(pendentes.pop(pronta), key=lambda p: p[0])]
+                proximo += 1
+                df_ano = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+                df_ano.attrs["combinacoes_falhas"] = sorted(falhas.pop(pronta))
+                rotulo = f"Ano {pronta[0]}" + (f" / índice {pronta[1]}" if pronta[1] else "")
+                print(f"\n   {rotulo}: {len(df_ano)} registros de {len(partes)}/{por_particao[pronta]} combinações"
+                      + (f" ({len(df_ano.attrs['combinacoes_falhas'])} com falha)" if df_ano.attrs["combinacoes_falhas"] else ""))
+                yield pronta[0], pronta[1], df_ano
+        fim.set()
+    print(metricas.resumo())
@@ -0,0 +1,164 @@
+"""
+Revalidação por amostragem: verifica se o SISVAN revisou anos já coletados sem baixar tudo.
+
+Sorteia combinações (ano, raça, fase, sexo) dos CSVs já gravados, refaz só essas
+requisições e compara o hash da tabela retornada com o hash das mesmas linhas no CSV.
+Amostra aleatória simples ou estratificada por ano (mesmo número de combinações por ano).
+Se a fração de amostras divergentes passar do limiar, os anos com divergência podem ser
+recoletados por inteiro (e só eles). Se nenhuma amostra pôde ser verificada, ou a fração de
+requisições com falha passar do limiar, o resultado é inconclusivo (API fora do ar não é
+"dados em dia") e nada é recoletado. Cada execução acrescenta uma linha em revalidacao.jsonl.
+"""
+import glob
+import hashlib
+import json
+import os
+import random
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import BASE_DIR, ano_do_arquivo, dimensoes, fases_indice, ler_linhas
+
+REVALIDACAO_JSONL = os.path.join(BASE_DIR, "revalidacao.jsonl")
+
+Combinacao = Tuple[int, str, str, str]  # (ano, raca, fase, sexo)
+
+
+def hash_tabela(linhas: List[Dict[str, str]], colunas: List[str]) -> str:
+    """Hash das colunas do relatório, linhas ordenadas por Codigo_IBGE.
+    Percentuais normalizados para ponto decimal (o CSV grava com vírgula)."""
+    normalizadas = sorted(";".join(str(row[c]).replace(",", ".") for c in colunas) for row in linhas)
+    return hashlib.sha256("\n".join(normalizadas).encode("utf-8")).hexdigest()
+
+
+def hashes_armazenados(path: str, colunas: List[str]) -> Dict[Tuple[str, str, str], str]:
+    """Hash por combinação (raça, fase, sexo) das linhas de um CSV de ano."""
+    grupos: Dict[Tuple[str, str, str], List[Dict[str, str]]] = {}
+    for row in ler_linhas(path):
+        grupos.setdefault((row["Raca_Codigo"], row["Fase_Idade"], row["Sexo_Codigo"]), []).append(row)
+    return {chave: hash_tabela(linhas, colunas) for chave, linhas in grupos.items()}
+
+
+def arquivos_por_ano(dir_dados: str) -> Dict[int, str]:
+    arquivos = {}
+    for path in glob.glob(os.path.join(dir_dados, "dados_sisvan_racas_idades_*.csv")):
+        ano = ano_do_arquivo(path)
+        if ano is not None:
+            arquivos[ano] = path
+    return dict(sorted(arquivos.items()))
+
+
+def sortear(anos: List[int], tamanho: int, estratificada: bool, semente: Optional[int],
+            indice: Optional[str] = None) -> List[Combinacao]:
+    """Sorteia `tamanho` combinações (só fases do índice); estratificada = repartidas igualmente entre os anos."""
+    RACAS, SEXOS, _ = dimensoes()
+    rng = random.Random(semente)
+    universo = {ano: [(ano, r, f, s) for r in RACAS for f in fases_indice(indice) for s in SEXOS] for ano in anos}
+    if not estratificada:
+        todas = [c for combos in universo.values() for c in combos]
+        return rng.sample(todas, min(tamanho, len(todas)))
+    amostra = []
+    por_ano, sobra = divmod(tamanho, len(anos))
+    for i, ano in enumerate(anos):
+        n = min(por_ano + (1 if i < sobra else 0), len(universo[ano]))
+        amostra.extend(rng.sample(universo[ano], n))
+    return amostra
+
+
+def revalidar(dir_dados: str, tamanho: int = 30, estratificada: bool = True, limiar: float = 0.05,
+              semente: Optional[int] = None, indice: Optional[str] = None, recoletar: bool = False,
+              dir_deltas: Optional[str] = None, pausa: float = 1.0) -> Dict:
+    """Revalida uma amostra contra a API; retorna (e registra) o resumo por ano.
+    indice: partição indice_<N> (coleta --indices); None = CSVs padrão do índice 1.
+    Com recoletar=True e divergência acima do limiar, recoleta só os anos divergentes; um ano
+    com combinações que falharam na recoleta mantém o CSV atual (registro["recoleta_incompleta"]).
+    registro["inconclusivo"] indica que a amostra não pôde ser verificada (falhas demais)."""
+    import ETL_criança
+
+    arquivos = arquivos_por_ano(dir_dados)
+    if not arquivos:
+        print(f"Nenhum CSV de ano encontrado em {dir_dados}")
+        return {}
+    colunas = ETL_criança.colunas_indice(indice or "1")
+    amostra = sortear(list(arquivos), tamanho, estratificada, semente, indice)
+    print(f"Revalidando {len(amostra)} combinações de {len(arquivos)} ano(s) "
+          f"({'estratificada' if estratificada else 'aleatória'}, limiar {limiar:.0%})")
+
+    # Sem sessão (API inacessível) todas as amostras contam como falha: registro inconclusivo
+    session = ETL_criança.obter_sessao()
+    armazenados = {ano: hashes_armazenados(path, colunas)
+                   for ano, path in arquivos.items() if any(c[0] == ano for c in amostra)}
+    por_ano: Dict[int, Dict[str, int]] = {}
+    for ano, raca, fase, sexo in amostra:
+        estado = por_ano.setdefault(ano, {"amostras": 0, "divergentes": 0, "falhas": 0})
+        estado["amostras"] += 1
+        if session is None:
+            estado["falhas"] += 1
+            continue
+        html = ETL_criança.fazer_requisicao(session, raca, fase, sexo, ano, indice=indice or "1")
+        if pausa:
+            time.sleep(pausa)
+        if html is None:
+            estado["falhas"] += 1
+            continue
+        df = ETL_criança.processar_html_para_dataframe(html, indice or "1")
+        linhas = [] if df is None else df.astype(str).to_dict("records")
+        atual = hash_tabela(linhas, colunas) if linhas else None
+        if atual != armazenados[ano].get((raca, fase, sexo)):
+            estado["divergentes"] += 1
+            print(f"      DIVERGENTE: Ano {ano} | Raça {raca} | Fase {fase} | Sexo {sexo}")
+
+    falhas = sum(e["falhas"] for e in por_ano.values())
+    verificadas = len(amostra) - falhas
+    divergentes = sum(e["divergentes"] for e in por_ano.values())
+    taxa = divergentes / verificadas if verificadas else 0.0
+    anos_divergentes = sorted(ano for ano, e in por_ano.items() if e["divergentes"])
+    inconclusivo = verificadas == 0 or falhas / len(amostra) > limiar
+    escalar = taxa > limiar and not inconclusivo
+    print(f"\nDivergência: {divergentes}/{verificadas} ({taxa:.1%}) | anos afetados: {anos_divergentes or '-'}")
+    if inconclusivo:
+        print(f"INCONCLUSIVO: {falhas}/{len(amostra)} requisições falharam (limiar {limiar:.0%}); "
+              f"nada foi recoletado.")
+
+    recoletados = []
+    incompletos: Dict[str, List[List[str]]] = {}
+    if escalar and recoletar:
+        for ano in anos_divergentes:
+            df = ETL_criança.coletar_dados_para_ano(ano, indice, session)
+            if df.empty:
+                print(f"   AVISO: Nenhum dado para {ano}, mantendo o CSV atual.")
+                continue
+            falhas_ano = df.attrs.get("combinacoes_falhas", [])
+            if falhas_ano:
+                # Gravar o ano parcial apagaria as linhas dessas combinações do CSV
+                print(f"   AVISO: {len(falhas_ano)} combinação(ões) falharam na recoleta de {ano}, "
+                      f"mantendo o CSV atual: {falhas_ano}")
+                incompletos[str(ano)] = [list(c) for c in falhas_ano]
+                continue
+            ETL_criança.salvar_ano(df, ano, dir_dados, dir_deltas)
+            recoletados.append(ano)
+    elif escalar:
+        print(f"Acima do limiar: recolete os anos {anos_divergentes} (use --recoletar).")
+
+    registro = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "dir": os.path.relpath(dir_dados, BASE_DIR),
+        "indice": indice,
+        "amostra": len(amostra),
+        "estratificada": estratificada,
+        "semente": semente,
+        "verificadas": verificadas,
+        "falhas": falhas,
+        "divergentes": divergentes,
+        "taxa": round(taxa, 4),
+        "limiar": limiar,
+        "inconclusivo": inconclusivo,
+        "por_ano": {str(ano): e for ano, e in sorted(por_ano.items())},
+        "anos_divergentes": anos_divergentes,
+        "recoletados": recoletados,
+        "recoleta_incompleta": incompletos,
+    }
+    with open(REVALIDACAO_JSONL, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    return registro
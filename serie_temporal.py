@@ -0,0 +1,167 @@
+"""
+Cubo NumPy para análise temporal dos CSVs de crianças (2015–2025).
+
+Layout denso: ano × município × raça × sexo × fase × medida (float32, NaN = sem dado),
+gravado em <dir>/cubo.npy (lido com mmap, sem carregar tudo na memória) e os rótulos
+dos eixos em <dir>/cubo_eixos.json.
+
+Só as quantidades são guardadas; percentuais são calculados depois da agregação
+(soma de Qtd / soma de Total), o que é correto ao juntar fases, raças ou sexos.
+
+Exemplo — maiores altas de Elevado_Perc em menores de 5 anos (fases 1, 2, 3):
+    cubo, eixos = carregar_cubo("cubo")
+    agregado = agregar(cubo, eixos, fases=["1", "2", "3"])
+    serie = percentual(agregado, eixos, "Elevado")
+    maiores_variacoes(serie, eixos, 2015, 2025, k=10)
+"""
+import json
+import os
+import warnings
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import COLUNAS_QTD, ano_do_arquivo, dimensoes, ler_linhas, para_int
+
+CUBO_NPY = "cubo.npy"
+CUBO_EIXOS = "cubo_eixos.json"
+
+
+# ============================================================================
+# CONSTRUÇÃO E CARGA
+# ============================================================================
+
+def construir_cubo(arquivos: List[str], dir_saida: str) -> Tuple[np.ndarray, Dict]:
+    """Lê os CSVs por ano e grava o cubo denso + rótulos dos eixos.
+    Como em estrela.gerar_estrela, arquivos sem ano no nome são pulados; linhas cujo Ano
+    difere do arquivo também (com aviso)."""
+    racas, sexos, fases = dimensoes()
+    por_ano: List[Tuple[int, str]] = []
+    for path in arquivos:
+        ano = ano_do_arquivo(path)
+        if ano is None:
+            print(f"  AVISO: ano não identificado em {path}, pulando.")
+            continue
+        por_ano.append((ano, path))
+    anos = sorted({ano for ano, _ in por_ano})
+    municipios: Dict[str, str] = {}
+    for _, path in por_ano:
+        for row in ler_linhas(path):
+            municipios.setdefault(row["Codigo_IBGE"], row["Municipio"])
+    eixos = {
+        "ano": anos,
+        "municipio": sorted(municipios),
+        "municipio_nome": [municipios[c] for c in sorted(municipios)],
+        "raca": list(racas),
+        "sexo": list(sexos),
+        "fase": list(fases),
+        "medida": COLUNAS_QTD,
+    }
+    pos = {eixo: {str(v): i for i, v in enumerate(eixos[eixo])}
+           for eixo in ("ano", "municipio", "raca", "sexo", "fase")}
+    forma = tuple(len(eixos[e]) for e in ("ano", "municipio", "raca", "sexo", "fase", "medida"))
+
+    os.makedirs(dir_saida, exist_ok=True)
+    cubo = np.lib.format.open_memmap(os.path.join(dir_saida, CUBO_NPY), mode="w+",
+                                     dtype=np.float32, shape=forma)
+    cubo[:] = np.nan
+    for ano, path in por_ano:
+        ignoradas = 0
+        for row in ler_linhas(path):
+            if row["Ano"] != str(ano):
+                ignoradas += 1
+                continue
+            idx = (pos["ano"][row["Ano"]], pos["municipio"][row["Codigo_IBGE"]],
+                   pos["raca"][row["Raca_Codigo"]], pos["sexo"][row["Sexo_Codigo"]],
+                   pos["fase"][row["Fase_Idade"]])
+            cubo[idx] = [para_int(row[m]) for m in COLUNAS_QTD]
+        if ignoradas:
+            print(f"  AVISO: {ignoradas} linha(s) de {os.path.basename(path)} com Ano diferente de {ano}, puladas.")
+    cubo.flush()
+    with open(os.path.join(dir_saida, CUBO_EIXOS), "w", encoding="utf-8") as f:
+        json.dump(eixos, f, ensure_ascii=False)
+    return cubo, eixos
+
+
+def carregar_cubo(dir_cubo: str) -> Tuple[np.ndarray, Dict]:
+    """Abre o cubo em modo somente leitura via mmap (custo de abertura constante)."""
+    with open(os.path.join(dir_cubo, CUBO_EIXOS), "r", encoding="utf-8") as f:
+        eixos = json.load(f)
+    return np.load(os.path.join(dir_cubo, CUBO_NPY), mmap_mode="r"), eixos
+
+
+# ============================================================================
+# KERNELS VETORIZADOS
+# ============================================================================
+
+def _indices(eixos: Dict, eixo: str, valores: Optional[List[str]]) -> List[int]:
+    if not valores:
+        return list(range(len(eixos[eixo])))
+    return [eixos[eixo].index(v) for v in valores]
+
+
+def agregar(cubo: np.ndarray, eixos: Dict, racas: Optional[List[str]] = None,
+            sexos: Optional[List[str]] = None, fases: Optional[List[str]] = None) -> np.ndarray:
+    """Soma as quantidades sobre as raças/sexos/fases escolhidas -> (ano, município, medida)."""
+    sub = cubo[:, :, _indices(eixos, "raca", racas)]
+    sub = sub[:, :, :, _indices(eixos, "sexo", sexos)]
+    sub = sub[:, :, :, :, _indices(eixos, "fase", fases)]
+    # Tudo NaN (sem dado) continua NaN; NaN parcial conta como 0
+    soma = np.nansum(sub, axis=(2, 3, 4))
+    soma[np.isnan(sub).all(axis=(2, 3, 4))] = np.nan
+    return soma
+
+
+def percentual(agregado: np.ndarray, eixos: Dict, classe: str) -> np.ndarray:
+    """Percentual da classe (MuitoBaixo, Baixo, Adequado, Elevado) -> (ano, município)."""
+    qtd = agregado[:, :, eixos["medida"].index(f"{classe}_Qtd")]
+    total = agregado[:, :, eixos["medida"].index("Total")]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, qtd / total * 100, np.nan)
+
+
+def variacao_anual(serie: np.ndarray) -> np.ndarray:
+    """Diferença para o ano anterior (primeiro ano = NaN), mesmo formato de `serie`."""
+    delta = np.full_like(serie, np.nan, dtype=np.float64)
+    delta[1:] = serie[1:] - serie[:-1]
+    return delta
+
+
+def cagr(serie: np.ndarray) -> np.ndarray:
+    """Taxa de crescimento anual composta entre o primeiro e o último ano (por município)."""
+    inicio, fim = serie[0], serie[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(inicio > 0, (fim / inicio) ** (1.0 / (serie.shape[0] - 1)) - 1, np.nan)
+
+
+def media_movel(serie: np.ndarray, janela: int = 3) -> np.ndarray:
+    """Média móvel de `janela` anos ao longo do eixo 0 (primeiros janela-1 anos = NaN)."""
+    saida = np.full_like(serie, np.nan, dtype=np.float64)
+    if serie.shape[0] < janela:
+        return saida
+    janelas = np.lib.stride_tricks.sliding_window_view(serie, janela, axis=0)
+    with warnings.catch_warnings():
+        # Janela só com NaN (anos sem dado) resulta em NaN, sem aviso
+        warnings.simplefilter("ignore", RuntimeWarning)
+        saida[janela - 1:] = np.nanmean(janelas, axis=-1)
+    return saida
+
+
+def maiores_variacoes(serie: np.ndarray, eixos: Dict, ano_inicio: int, ano_fim: int,
+                      k: int = 10, maiores: bool = True) -> List[Dict]:
+    """Top-k municípios pela variação de `serie` entre ano_inicio e ano_fim."""
+    anos = eixos["ano"]
+    delta = serie[anos.index(ano_fim)] - serie[anos.index(ano_inicio)]
+    chave = np.where(np.isnan(delta), -np.inf, delta if maiores else -delta)
+    k = min(k, int(np.isfinite(chave).sum()))
+    if k <= 0:
+        return []
+    top = np.argpartition(-chave, k - 1)[:k]
+    top = top[np.argsort(-chave[top])]
+    return [{
+        "Codigo_IBGE": eixos["municipio"][i],
+        "Municipio": eixos["municipio_nome"][i],
+        "Inicio": round(float(serie[anos.index(ano_inicio), i]), 2),
+        "Fim": round(float(serie[anos.index(ano_fim), i]), 2),
+        "Variacao": round(float(delta[i]), 2),
+    } for i in top]
@@ -0,0 +1,209 @@
+"""
+Servidor HTTP local de consultas (JSON) sobre os CSVs de adultos e crianças.
+
+Os arquivos são carregados uma vez em memória, indexados por Codigo_IBGE, e as respostas
+ficam em cache LRU. Uma thread verifica periodicamente os arquivos (novos anos em
+Crianças/ ou CSVs regravados) e recarrega o índice; cada corpus tem o próprio cache,
+descartado junto com ele.
+
+Rotas:
+    GET /municipios?publico=crianca|adulto
+    GET /consulta?publico=crianca&municipio=recife&ibge=261160&ano=2024&raca=01&sexo=M&fase=1
+    GET /status
+Mesma busca de consultar_csv.py: nome parcial, sem diferenciar maiúsculas.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from config import CSV_ADULTO, DIR_CRIANCAS, ler_linhas
+
+# Parâmetro da URL -> coluna do CSV (filtros por igualdade)
+FILTROS = {"ano": "Ano", "raca": "Raca_Codigo", "sexo": "Sexo_Codigo", "fase": "Fase_Idade"}
+TAMANHO_CACHE = 1024
+
+
+class Corpus:
+    """Linhas de um público indexadas por Codigo_IBGE (somente leitura depois de criado)."""
+
+    def __init__(self, arquivos: List[str]):
+        self.arquivos = {path: os.path.getmtime(path) for path in arquivos}
+        self.linhas: List[Dict[str, str]] = []
+        self.por_ibge: Dict[str, List[int]] = {}
+        self.nomes: Dict[str, str] = {}
+        for path in arquivos:
+            for row in ler_linhas(path):
+                # Linha incompleta (arquivo ainda sendo gravado por outro processo): ignorada
+                if None in row or None in row.values() or not row.get("Codigo_IBGE") or not row.get("Municipio"):
+                    continue
+                self.por_ibge.setdefault(row["Codigo_IBGE"], []).append(len(self.linhas))
+                self.nomes.setdefault(row["Codigo_IBGE"], row["Municipio"])
+                self.linhas.append(row)
+        # Cache por geração: uma requisição ainda em curso no corpus antigo grava no cache
+        # dele, nunca no do corpus recarregado
+        self.responder = lru_cache(maxsize=TAMANHO_CACHE)(self._responder)
+
+    def _responder(self, rota: str, municipio: str, ibge: str, filtros: Tuple[Tuple[str, str], ...]) -> bytes:
+        """Resposta JSON já serializada; chave do cache = parâmetros normalizados."""
+        if rota == "/municipios":
+            dados = self.municipios()
+        else:
+            dados = self.consultar(municipio, ibge, filtros)
+        return json.dumps(dados, ensure_ascii=False).encode("utf-8")
+
+    def municipios(self) -> List[Dict[str, str]]:
+        return [{"Codigo_IBGE": codigo, "Municipio": nome}
+                for codigo, nome in sorted(self.nomes.items(), key=lambda item: item[1])]
+
+    def consultar(self, municipio: str, ibge: str, filtros: Tuple[Tuple[str, str], ...]) -> List[Dict[str, str]]:
+        nome = municipio.upper().strip()
+        codigos = [c for c, n in self.nomes.items() if (not ibge or c == ibge) and nome in n.upper()]
+        resultado = []
+        for codigo in codigos:
+            for i in self.por_ibge[codigo]:
+                row = self.linhas[i]
+                if all(row.get(col) == valor for col, valor in filtros):
+                    resultado.append(row)
+        return resultado
+
+
+def arquivos_publico(publico: str) -> List[str]:
+    if publico == "adulto":
+        return [CSV_ADULTO] if os.path.exists(CSV_ADULTO) else []
+    return sorted(glob.glob(os.path.join(DIR_CRIANCAS, "*.csv")))
+
+
+class Indice:
+    """Corpora carregados (cada um com seu cache de respostas); `recarregar_se_mudou` troca os corpora inteiros."""
+
+    def __init__(self):
+        self.corpora: Dict[str, Corpus] = {}
+        self._lock = threading.Lock()
+        self.recarregar_se_mudou()
+
+    def recarregar_se_mudou(self) -> bool:
+        with self._lock:
+            mudou = False
+            for publico in ("crianca", "adulto"):
+                arquivos = arquivos_publico(publico)
+                atual = self.corpora.get(publico)
+                estado = {path: os.path.getmtime(path) for path in arquivos}
+                if atual is None or atual.arquivos != estado:
+                    inicio = time.perf_counter()
+                    self.corpora[publico] = Corpus(arquivos)
+                    print(f"  Índice {publico}: {len(self.corpora[publico].linhas)} linhas de "
+                          f"{len(arquivos)} arquivo(s) em {time.perf_counter() - inicio:.2f}s")
+                    mudou = True
+            return mudou
+
+    def responder(self, rota: str, publico: str, municipio: str, ibge: str,
+                  filtros: Tuple[Tuple[str, str], ...]) -> bytes:
+        """Resposta do corpus atual do público (lido uma vez: a troca não afeta esta requisição)."""
+        return self.corpora[publico].responder(rota, municipio, ibge, filtros)
+
+    def status(self) -> Dict:
+        infos = [c.responder.cache_info() for c in self.corpora.values()]
+        return {
+            "corpora": {p: {"arquivos": len(c.arquivos), "linhas": len(c.linhas), "municipios": len(c.nomes)}
+                        for p, c in self.corpora.items()},
+            "cache": {"hits": sum(i.hits for i in infos), "misses": sum(i.misses for i in infos),
+                      "tamanho": sum(i.currsize for i in infos)},
+        }
+
+
+def criar_handler(indice: Indice):
+    class Handler(BaseHTTPRequestHandler):
+        def _enviar(self, status: int, corpo: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def _erro(self, status: int, mensagem: str) -> None:
+            self._enviar(status, json.dumps({"erro": mensagem}, ensure_ascii=False).encode("utf-8"))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if url.path == "/status":
+                self._enviar(200, json.dumps(indice.status()).encode("utf-8"))
+                return
+            if url.path not in ("/municipios", "/consulta"):
+                self._erro(404, f"Rota desconhecida: {url.path}")
+                return
+            publico = params.get("publico", "crianca")
+            if publico not in indice.corpora:
+                self._erro(400, f"Público inválido: {publico}")
+                return
+            municipio = params.get("municipio", "")
+            ibge = params.get("ibge", "")
+            if url.path == "/consulta" and not municipio and not ibge:
+                self._erro(400, "Informe municipio ou ibge.")
+                return
+            filtros = tuple(sorted((col, params[p]) for p, col in FILTROS.items() if params.get(p)))
+            self._enviar(200, indice.responder(url.path, publico, municipio, ibge, filtros))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def vigiar(indice: Indice, intervalo: float) -> None:
+    """Thread de hot-reload: verifica os arquivos a cada `intervalo` segundos."""
+    while True:
+        time.sleep(intervalo)
+        try:
+            if indice.recarregar_se_mudou():
+                print("  Índice recarregado.")
+        except Exception as e:
+            print(f"  ERRO ao recarregar índice: {e}")
+
+
+def servir(host: str = "127.0.0.1", porta: int = 8000, intervalo_reload: float = 5.0,
+           indice: Optional[Indice] = None) -> None:
+    indice = indice or Indice()
+    threading.Thread(target=vigiar, args=(indice, intervalo_reload), daemon=True).start()
+    servidor = ThreadingHTTPServer((host, porta), criar_handler(indice))
+    print(f"Servidor SISVAN em http://{host}:{porta} (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+def medir_latencia(url_base: str, clientes: int = 8, requisicoes: int = 50) -> Dict[str, float]:
+    """Dispara `requisicoes` consultas por cliente em `clientes` threads; retorna p50/p99 em ms."""
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.request import urlopen
+
+    with urlopen(f"{url_base}/municipios") as resp:
+        codigos = [m["Codigo_IBGE"] for m in json.loads(resp.read())]
+    if not codigos:
+        return {}
+
+    def cliente(n: int) -> List[float]:
+        tempos = []
+        for i in range(requisicoes):
+            codigo = codigos[(n * requisicoes + i) % len(codigos)]
+            inicio = time.perf_counter()
+            with urlopen(f"{url_base}/consulta?ibge={codigo}&ano=2024") as resp:
+                resp.read()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return tempos
+
+    with ThreadPoolExecutor(max_workers=clientes) as pool:
+        tempos = sorted(t for lista in pool.map(cliente, range(clientes)) for t in lista)
+    return {
+        "servidor_p50": round(tempos[len(tempos) // 2], 2),
+        "servidor_p99": round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))], 2),
+    }
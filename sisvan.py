@@ -0,0 +1,410 @@
+"""
+Ponto de entrada único dos scripts SISVAN.
+
+Subcomandos: collect, merge, query, validate, bench, diff, star, serve, cube, trend, verify, refresh.
+pandas, BeautifulSoup e requests só são importados dentro do subcomando que
+precisa deles; `--help`, query, validate e bench usam apenas a biblioteca padrão.
+
+Exemplos:
+    python sisvan.py collect --publico crianca --anos 2025 2023
+    python sisvan.py query --ano 2024 --ibge 261160
+    python sisvan.py validate
+    python sisvan.py bench
+    python sisvan.py diff anterior.csv novo.csv --ano 2024 --deltas deltas
+    python sisvan.py star --saida estrela
+    python sisvan.py serve --porta 8000
+    python sisvan.py cube --saida cubo
+    python sisvan.py trend --classe Elevado --fases 1 2 3 --de 2015 --ate 2025 --top 10
+    python sisvan.py verify --amostra 30 --limiar 0.05 --recoletar
+    python sisvan.py refresh --ibge 261160 260005 --anos 2024 2025
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from config import (BASE_DIR, COLUNAS_QTD, CSV_ADULTO, DIR_CRIANCAS, ano_do_arquivo, caminho_ano,
+                    dir_dados_indice, ler_linhas, para_int)
+
+# Métrica de cold-start acompanhada ao longo do tempo (uma linha JSON por execução do bench)
+BENCH_JSONL = os.path.join(BASE_DIR, "bench_sisvan.jsonl")
+
+# Colunas esperadas em Crianças/*.csv (ETL_criança.py)
+COLUNAS_CRIANCA = [
+    "Regiao", "Codigo_UF", "UF", "Codigo_IBGE", "Municipio",
+    "MuitoBaixo_Qtd", "MuitoBaixo_Perc", "Baixo_Qtd", "Baixo_Perc",
+    "Adequado_Qtd", "Adequado_Perc", "Elevado_Qtd", "Elevado_Perc", "Total",
+    "Ano", "Raca_Codigo", "Raca_Nome", "Sexo_Codigo", "Sexo_Nome", "Fase_Idade", "Fase_Nome",
+]
+
+
+# ============================================================================
+# SUBCOMANDOS
+# ============================================================================
+
+def cmd_collect(args) -> int:
+    """Coleta dados na API do SISVAN (importa pandas/bs4/requests só aqui)."""
+    if args.publico == "adulto":
+        import ETL
+        ETL.main()
+        return 0
+    if args.indices:
+        from config import indices_cri
+        invalidos = [i for i in args.indices if i not in indices_cri()]
+        if invalidos:
+            print(f"Índice(s) desconhecido(s): {invalidos} (disponíveis: {list(indices_cri())})")
+            return 1
+    import ETL_criança
+    inicio, fim = args.anos if args.anos else (ETL_criança.ANO_MAIS_RECENTE, ETL_criança.ANO_MAIS_ANTIGO)
+    ETL_criança.main(max(inicio, fim), min(inicio, fim), args.saida, args.deltas, args.estrela,
+                     args.fetchers, args.parsers, args.indices)
+    return 0
+
+
+def cmd_merge(args) -> int:
+    """Concatena CSVs em um único arquivo (juntar_csv.py)."""
+    from juntar_csv import juntar_csvs
+    return 0 if juntar_csvs(args.padrao, args.saida, args.encoding) else 1
+
+
+def cmd_query(args) -> int:
+    """Consulta um município por nome (busca parcial) ou código IBGE, sem carregar pandas."""
+    path = args.arquivo or (caminho_ano(args.ano) if args.ano else CSV_ADULTO)
+    if not os.path.exists(path):
+        print(f"Arquivo não encontrado: {path}")
+        return 1
+    if args.listar:
+        vistos = {}
+        for row in ler_linhas(path):
+            vistos.setdefault(row["Codigo_IBGE"], row["Municipio"])
+        for codigo, nome in sorted(vistos.items(), key=lambda item: item[1]):
+            print(f"  {codigo} - {nome}")
+        return 0
+    if not args.municipio and not args.ibge:
+        print("Informe --municipio, --ibge ou --listar.")
+        return 1
+    nome = (args.municipio or "").upper().strip()
+    encontrados = 0
+    writer = None
+    for row in ler_linhas(path):
+        if args.ibge and row["Codigo_IBGE"] != args.ibge:
+            continue
+        if nome and nome not in row["Municipio"].upper():
+            continue
+        if writer is None:
+            writer = csv.DictWriter(sys.stdout, fieldnames=list(row.keys()), delimiter=";")
+            writer.writeheader()
+        writer.writerow(row)
+        encontrados += 1
+    if not encontrados:
+        print(f"Nenhum município encontrado para: {args.municipio or args.ibge}")
+        return 1
+    print(f"\n--- {encontrados} registro(s) ---")
+    return 0
+
+
+def validar_arquivo(path: str) -> List[str]:
+    """Valida um CSV de crianças: colunas, Codigo_IBGE com 6 dígitos, Ano do nome do arquivo,
+    quantidades inteiras e chaves (município, raça, sexo, fase) sem duplicatas."""
+    erros = []
+    nome = os.path.basename(path)
+    ano_arquivo = str(ano_do_arquivo(path))
+    chaves = set()
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f, delimiter=";")
+        faltando = [c for c in COLUNAS_CRIANCA if c not in (reader.fieldnames or [])]
+        if faltando:
+            return [f"{nome}: colunas ausentes {faltando}"]
+        for n, row in enumerate(reader, start=2):
+            if len(row["Codigo_IBGE"]) != 6 or not row["Codigo_IBGE"].isdigit():
+                erros.append(f"{nome}:{n}: Codigo_IBGE inválido ({row['Codigo_IBGE']})")
+            if row["Ano"] != ano_arquivo:
+                erros.append(f"{nome}:{n}: Ano {row['Ano']} difere do arquivo ({ano_arquivo})")
+            for col in COLUNAS_QTD:
+                if para_int(row[col]) is None:
+                    erros.append(f"{nome}:{n}: {col} não é inteiro ({row[col]})")
+            chave = (row["Codigo_IBGE"], row["Raca_Codigo"], row["Sexo_Codigo"], row["Fase_Idade"])
+            if chave in chaves:
+                erros.append(f"{nome}:{n}: linha duplicada para {chave}")
+            chaves.add(chave)
+    return erros
+
+
+def cmd_validate(args) -> int:
+    """Valida os CSVs de crianças (padrão: Crianças/*.csv)."""
+    arquivos = args.arquivos or sorted(glob.glob(os.path.join(DIR_CRIANCAS, "*.csv")))
+    if not arquivos:
+        print("Nenhum arquivo CSV encontrado.")
+        return 1
+    total_erros = 0
+    for path in arquivos:
+        erros = validar_arquivo(path)
+        status = "OK" if not erros else f"{len(erros)} erro(s)"
+        print(f"  {os.path.basename(path)}: {status}")
+        for erro in erros[:args.max_erros]:
+            print(f"    {erro}")
+        total_erros += len(erros)
+    return 0 if total_erros == 0 else 1
+
+
+def cmd_diff(args) -> int:
+    """Grava o delta entre dois CSVs do mesmo ano (ver cdc.py)."""
+    from cdc import registrar_delta
+    for path in (args.anterior, args.novo):
+        if not os.path.exists(path):
+            print(f"Arquivo não encontrado: {path}")
+            return 1
+    registrar_delta(args.anterior, args.novo, args.deltas, args.ano)
+    return 0
+
+
+def cmd_star(args) -> int:
+    """Gera fato (chaves inteiras) e dimensões a partir dos CSVs de crianças (ver estrela.py)."""
+    from estrela import gerar_estrela
+    arquivos = args.arquivos or sorted(glob.glob(os.path.join(DIR_CRIANCAS, "*.csv")))
+    if not arquivos:
+        print("Nenhum arquivo CSV encontrado.")
+        return 1
+    gerar_estrela(arquivos, args.saida)
+    return 0
+
+
+def cmd_serve(args) -> int:
+    """Sobe o servidor HTTP local de consultas (ver servidor.py)."""
+    from servidor import servir
+    servir(args.host, args.porta, args.reload)
+    return 0
+
+
+def cmd_cube(args) -> int:
+    """Constrói o cubo NumPy (ano × município × raça × sexo × fase × medida); ver serie_temporal.py."""
+    from serie_temporal import construir_cubo
+    arquivos = args.arquivos or sorted(glob.glob(os.path.join(DIR_CRIANCAS, "*.csv")))
+    if not arquivos:
+        print("Nenhum arquivo CSV encontrado.")
+        return 1
+    inicio = time.perf_counter()
+    cubo, _ = construir_cubo(arquivos, args.saida)
+    print(f"Cubo {cubo.shape} gravado em {args.saida} ({time.perf_counter() - inicio:.2f}s)")
+    return 0
+
+
+def cmd_trend(args) -> int:
+    """Top-k municípios pela variação do percentual de uma classe entre dois anos."""
+    from serie_temporal import agregar, cagr, carregar_cubo, maiores_variacoes, percentual
+    if not os.path.exists(os.path.join(args.cubo, "cubo.npy")):
+        print(f"Cubo não encontrado em {args.cubo}. Execute primeiro: python sisvan.py cube")
+        return 1
+    cubo, eixos = carregar_cubo(args.cubo)
+    for ano in (args.de, args.ate):
+        if ano not in eixos["ano"]:
+            print(f"Ano {ano} fora do cubo ({eixos['ano'][0]}–{eixos['ano'][-1]}).")
+            return 1
+    agregado = agregar(cubo, eixos, args.racas, args.sexos, args.fases)
+    serie = percentual(agregado, eixos, args.classe)
+    i0, i1 = eixos["ano"].index(args.de), eixos["ano"].index(args.ate)
+    taxas = cagr(serie[i0:i1 + 1])
+    print(f"{args.classe}_Perc: {'maiores altas' if not args.quedas else 'maiores quedas'} {args.de} → {args.ate}")
+    resultado = maiores_variacoes(serie, eixos, args.de, args.ate, args.top, not args.quedas)
+    if not resultado:
+        print("  Nenhum município com dados nos dois anos.")
+        return 1
+    for item in resultado:
+        taxa = taxas[eixos["municipio"].index(item["Codigo_IBGE"])]
+        taxa_txt = f"{taxa * 100:+.1f}%" if taxa == taxa else "n/d"
+        print(f"  {item['Codigo_IBGE']} {item['Municipio']:<32} {item['Inicio']:>7.2f} → {item['Fim']:>7.2f} "
+              f"({item['Variacao']:+.2f} p.p., CAGR {taxa_txt})")
+    return 0
+
+
+def cmd_verify(args) -> int:
+    """Revalida uma amostra de combinações contra a API (ver revalidacao.py).
+    Saída: 0 em dia (ou recoletado), 2 divergência acima do limiar, 3 inconclusivo."""
+    from revalidacao import revalidar
+    dir_dados = args.dir or dir_dados_indice(args.indice)
+    registro = revalidar(dir_dados, args.amostra, not args.aleatoria, args.limiar, args.semente,
+                         args.indice, args.recoletar, args.deltas)
+    if not registro:
+        return 1
+    if registro["inconclusivo"]:
+        return 3
+    recoletado = registro["recoletados"] and set(registro["recoletados"]) == set(registro["anos_divergentes"])
+    return 0 if registro["taxa"] <= args.limiar or recoletado else 2
+
+
+def cmd_refresh(args) -> int:
+    """Reconsulta só os municípios informados e atualiza os CSVs por ano (ver atualizacao.py)."""
+    invalidos = [c for c in args.ibge if len(c) != 6 or not c.isdigit()]
+    if invalidos:
+        print(f"Código(s) IBGE inválido(s): {invalidos} (esperado: 6 dígitos)")
+        return 1
+    from atualizacao import atualizar_municipios
+    dir_dados = args.dir or dir_dados_indice(args.indice)
+    atualizados, falhas = atualizar_municipios(args.ibge, args.anos, dir_dados, args.limite, args.indice,
+                                               args.deltas)
+    if falhas:
+        print(f"Anos não atualizados por falha nas requisições: {sorted(falhas)}")
+        return 2
+    return 0 if atualizados else 1
+
+
+def medir_ms(comando: List[str], repeticoes: int) -> float:
+    """Mediana (ms) do tempo de parede de `comando` executado em processos novos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run(comando, cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def cmd_bench(args) -> int:
+    """Mede o cold-start do CLI e o custo de importação das dependências pesadas;
+    acrescenta o resultado em bench_sisvan.jsonl."""
+    py = sys.executable
+    alvos = {
+        "python_vazio": [py, "-c", "pass"],
+        "sisvan_help": [py, "sisvan.py", "--help"],
+        "sisvan_query": [py, "sisvan.py", "query", "--ibge", "261160"],
+        "import_pandas": [py, "-c", "import pandas"],
+        "import_bs4": [py, "-c", "import bs4"],
+        "import_requests": [py, "-c", "import requests"],
+    }
+    metricas = {}
+    for nome, comando in alvos.items():
+        metricas[nome] = round(medir_ms(comando, args.repeticoes), 1)
+        print(f"  {nome:<16} {metricas[nome]:>8.1f} ms")
+    if args.servidor:
+        from servidor import medir_latencia
+        for nome, valor in medir_latencia(args.servidor.rstrip("/"), args.clientes).items():
+            metricas[nome] = valor
+            print(f"  {nome:<16} {valor:>8.1f} ms")
+    registro = {"data": datetime.now().isoformat(timespec="seconds"), "repeticoes": args.repeticoes,
+                "metricas_ms": metricas}
+    if not args.sem_registro:
+        with open(BENCH_JSONL, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        print(f"\nRegistrado em {os.path.basename(BENCH_JSONL)}")
+    return 0
+
+
+# ============================================================================
+# FUNÇÃO PRINCIPAL
+# ============================================================================
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="sisvan", description="Ferramentas SISVAN (coleta, junção, consulta).")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("collect", help="Coleta dados na API do SISVAN")
+    p.add_argument("--publico", choices=["crianca", "adulto"], default="crianca")
+    p.add_argument("--anos", nargs=2, type=int, metavar=("INICIO", "FIM"),
+                   help="Intervalo de anos (padrão: o definido em ETL_criança.py)")
+    p.add_argument("--saida", default=DIR_CRIANCAS, help="Diretório dos CSVs por ano (padrão: Crianças/)")
+    p.add_argument("--deltas", help="Diretório dos deltas (inserts/updates/deletes) contra o CSV anterior")
+    p.add_argument("--estrela", help="Diretório da saída em esquema estrela (fato + dimensões)")
+    p.add_argument("--fetchers", type=int, default=0,
+                   help="Threads de requisição; > 0 ativa a coleta em pipeline (pipeline.py)")
+    p.add_argument("--parsers", type=int, help="Processos de parsing no pipeline (padrão: núcleos)")
+    p.add_argument("--indices", nargs="+", help="Índices nu_indice_cri (utils.json: INDICES_CRI) coletados "
+                   "na mesma execução; grava em <saida>/indice_<N>/ com coluna Indice")
+    p.set_defaults(func=cmd_collect)
+
+    p = sub.add_parser("merge", help="Concatena CSVs em um único arquivo")
+    p.add_argument("--padrao", default="*.csv")
+    p.add_argument("--saida", default="combinado_sisvan.csv")
+    p.add_argument("--encoding", default="latin1", help="Encoding de leitura (padrão: latin1)")
+    p.set_defaults(func=cmd_merge)
+
+    p = sub.add_parser("query", help="Consulta um município no CSV")
+    p.add_argument("--arquivo", help="CSV a consultar (padrão: dados_sisvan_adulto.csv)")
+    p.add_argument("--ano", type=int, help="Consulta Crianças/dados_sisvan_racas_idades_<ano>.csv")
+    p.add_argument("--municipio", help="Nome (ou parte do nome) do município")
+    p.add_argument("--ibge", help="Código IBGE (6 dígitos)")
+    p.add_argument("--listar", action="store_true", help="Lista todos os municípios")
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("validate", help="Valida os CSVs de crianças")
+    p.add_argument("arquivos", nargs="*")
+    p.add_argument("--max-erros", type=int, default=10, help="Erros exibidos por arquivo")
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser("bench", help="Mede o tempo de cold-start")
+    p.add_argument("--repeticoes", type=int, default=5)
+    p.add_argument("--sem-registro", action="store_true", help="Não grava em bench_sisvan.jsonl")
+    p.add_argument("--servidor", help="URL de um `sisvan serve` para medir latência p50/p99")
+    p.add_argument("--clientes", type=int, default=8, help="Clientes concorrentes (com --servidor)")
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("diff", help="Gera o delta entre dois CSVs do mesmo ano")
+    p.add_argument("anterior")
+    p.add_argument("novo")
+    p.add_argument("--ano", type=int, required=True)
+    p.add_argument("--deltas", default="deltas", help="Diretório dos deltas (padrão: deltas)")
+    p.set_defaults(func=cmd_diff)
+
+    p = sub.add_parser("star", help="Gera fato e dimensões (esquema estrela) dos CSVs de crianças")
+    p.add_argument("arquivos", nargs="*")
+    p.add_argument("--saida", default="estrela", help="Diretório de saída (padrão: estrela)")
+    p.set_defaults(func=cmd_star)
+
+    p = sub.add_parser("serve", help="Servidor HTTP local de consultas (JSON)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--porta", type=int, default=8000)
+    p.add_argument("--reload", type=float, default=5.0, help="Intervalo (s) de verificação dos arquivos")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("cube", help="Constrói o cubo NumPy dos CSVs de crianças")
+    p.add_argument("arquivos", nargs="*")
+    p.add_argument("--saida", default="cubo", help="Diretório do cubo (padrão: cubo)")
+    p.set_defaults(func=cmd_cube)
+
+    p = sub.add_parser("trend", help="Maiores variações de percentual entre dois anos (usa o cubo)")
+    p.add_argument("--cubo", default="cubo")
+    p.add_argument("--classe", choices=["MuitoBaixo", "Baixo", "Adequado", "Elevado"], default="Elevado")
+    p.add_argument("--racas", nargs="*", help="Códigos de raça (padrão: todas)")
+    p.add_argument("--sexos", nargs="*", help="Códigos de sexo (padrão: todos)")
+    p.add_argument("--fases", nargs="*", help="Fases de idade (ex.: 1 2 3 = menores de 5 anos)")
+    p.add_argument("--de", type=int, default=2015)
+    p.add_argument("--ate", type=int, default=2025)
+    p.add_argument("--top", type=int, default=10)
+    p.add_argument("--quedas", action="store_true", help="Lista as maiores quedas")
+    p.set_defaults(func=cmd_trend)
+
+    p = sub.add_parser("verify", help="Revalida por amostragem os CSVs já coletados contra a API")
+    p.add_argument("--dir", help="Diretório dos CSVs por ano (padrão: Crianças/ ou Crianças/indice_<N>/)")
+    p.add_argument("--indice", help="Partição de índice (coleta com --indices); padrão: CSVs do índice 1")
+    p.add_argument("--amostra", type=int, default=30, help="Número de combinações (ano, raça, fase, sexo)")
+    p.add_argument("--aleatoria", action="store_true", help="Amostra aleatória simples (padrão: estratificada por ano)")
+    p.add_argument("--limiar", type=float, default=0.05, help="Fração de divergência que dispara a recoleta")
+    p.add_argument("--semente", type=int, help="Semente do sorteio (reprodutível)")
+    p.add_argument("--recoletar", action="store_true", help="Recoleta os anos divergentes acima do limiar")
+    p.add_argument("--deltas", help="Diretório dos deltas da recoleta (ver cdc.py)")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("refresh", help="Atualiza só alguns municípios nos CSVs por ano já gravados")
+    p.add_argument("--ibge", nargs="+", required=True, help="Códigos IBGE (6 dígitos)")
+    p.add_argument("--anos", nargs="+", type=int, required=True)
+    p.add_argument("--dir", help="Diretório dos CSVs por ano (padrão: Crianças/ ou Crianças/indice_<N>/)")
+    p.add_argument("--indice", help="Partição de índice (coleta com --indices); padrão: CSVs do índice 1")
+    p.add_argument("--limite", type=int, default=5,
+                   help="Acima deste número de municípios, requisita todos (99) e filtra")
+    p.add_argument("--deltas", help="Diretório dos deltas da atualização (ver cdc.py)")
+    p.set_defaults(func=cmd_refresh)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = criar_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
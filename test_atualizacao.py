@@ -0,0 +1,81 @@
+"""Testes da substituição de linhas por chave (atualizacao.py). Rodar com: python -m pytest -q"""
+import pandas as pd
+
+from atualizacao import substituir_linhas
+from cdc import calcular_delta
+from config import ler_linhas
+from ETL_criança import salvar_csv_powerbi
+
+COLUNAS = ["Codigo_IBGE", "Municipio", "Elevado_Qtd", "Elevado_Perc", "Total",
+           "Ano", "Raca_Codigo", "Sexo_Codigo", "Fase_Idade"]
+
+
+def existente():
+    """Como atualizar_municipios lê o CSV do ano: tudo texto, percentuais com vírgula."""
+    return pd.DataFrame([
+        ["261160", "RECIFE", "5", "12,5", "40", "2024", "01", "M", "1"],
+        ["261160", "RECIFE", "3", "7,5", "40", "2024", "01", "F", "1"],
+        ["260005", "ABREU E LIMA", "1", "10", "10", "2024", "01", "M", "1"],
+    ], columns=COLUNAS)
+
+
+def novas(linhas):
+    """Como sai do parser + anotar_combinacao: Ano inteiro, percentuais com ponto."""
+    df = pd.DataFrame(linhas, columns=COLUNAS)
+    df["Ano"] = df["Ano"].astype(int)
+    return df
+
+
+def test_substitui_so_a_chave_correspondente():
+    resultado = substituir_linhas(existente(), novas([["261160", "RECIFE", "6", "15", "40", 2024, "01", "M", "1"]]))
+    assert list(resultado.columns) == COLUNAS
+    assert resultado["Elevado_Qtd"].tolist() == ["6", "3", "1"]
+    assert resultado.iloc[1].tolist() == existente().iloc[1].tolist()
+    assert resultado.iloc[2].tolist() == existente().iloc[2].tolist()
+
+
+def test_chave_nova_vai_para_o_fim():
+    resultado = substituir_linhas(existente(), novas([
+        ["260010", "AFOGADOS", "2", "20", "10", 2024, "01", "M", "1"],
+        ["260005", "ABREU E LIMA", "2", "20", "10", 2024, "01", "M", "1"],
+    ]))
+    assert resultado["Codigo_IBGE"].tolist() == ["261160", "261160", "260005", "260010"]
+    assert resultado["Elevado_Qtd"].tolist() == ["5", "3", "2", "2"]
+
+
+def test_tipos_texto_apos_substituir():
+    resultado = substituir_linhas(existente(), novas([["261160", "RECIFE", "6", "15.5", "40", 2024, "01", "M", "1"]]))
+    assert resultado.iloc[0]["Ano"] == "2024"
+    assert all(isinstance(v, str) for v in resultado.iloc[0])
+    assert not resultado.isna().any().any()
+
+
+def test_ida_e_volta_pelo_csv_so_altera_a_linha_atualizada(tmp_path):
+    antes, depois = tmp_path / "antes.csv", tmp_path / "depois.csv"
+    salvar_csv_powerbi(existente(), str(antes))
+    lido = pd.read_csv(antes, sep=";", encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    atualizado = substituir_linhas(lido, novas([["261160", "RECIFE", "6", "15.5", "40", 2024, "01", "M", "1"]]))
+    salvar_csv_powerbi(atualizado, str(depois))
+    _, inserts, updates, deletes = calcular_delta(list(ler_linhas(str(antes))), list(ler_linhas(str(depois))))
+    assert inserts == [] and deletes == []
+    assert len(updates) == 1
+    assert updates[0]["Elevado_Perc"] == "15,5"
+    assert updates[0]["Colunas_Alteradas"] == "Elevado_Qtd|Elevado_Perc"
+
+
+def test_falha_de_requisicao_mantem_o_csv(tmp_path, monkeypatch):
+    import ETL_criança
+    from atualizacao import atualizar_municipios
+
+    csv_ano = tmp_path / "dados_sisvan_racas_idades_2024.csv"
+    salvar_csv_powerbi(existente(), str(csv_ano))
+    antes = csv_ano.read_bytes()
+    monkeypatch.setattr(ETL_criança, "obter_sessao", lambda: object())
+    monkeypatch.setattr(ETL_criança, "fazer_requisicao",
+                        lambda session, raca, *a, **k: None if raca == "05" else "<html></html>")
+    monkeypatch.setattr(ETL_criança, "processar_html_para_dataframe",
+                        lambda html, indice: novas([["261160", "RECIFE", "6", "15", "40", 2024, "01", "M", "1"]]))
+    atualizados, falhas = atualizar_municipios(["261160"], [2024], str(tmp_path), pausa=0)
+    assert atualizados == []
+    assert falhas[2024] and all(f[0] == "05" and f[3] == "261160" for f in falhas[2024])
+    assert csv_ano.read_bytes() == antes
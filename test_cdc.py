@@ -0,0 +1,57 @@
+"""Testes do delta entre coletas (cdc.py). Rodar com: python -m pytest -q"""
+import json
+
+from cdc import calcular_delta, registrar_delta
+from config import ler_linhas
+
+
+def linha(ibge, raca="01", total="10", perc="1,5"):
+    return {"Codigo_IBGE": ibge, "Municipio": f"M{ibge}", "Ano": "2024", "Raca_Codigo": raca,
+            "Sexo_Codigo": "M", "Fase_Idade": "1", "Total": total, "Elevado_Perc": perc}
+
+
+def gravar(path, linhas):
+    colunas = list(linhas[0])
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        f.write(";".join(colunas) + "\n")
+        for row in linhas:
+            f.write(";".join(row[c] for c in colunas) + "\n")
+
+
+def test_chave_usa_so_dimensoes_presentes():
+    chave, *_ = calcular_delta([linha("261160")], [linha("261160")])
+    assert chave == ["Codigo_IBGE", "Ano", "Raca_Codigo", "Sexo_Codigo", "Fase_Idade"]
+
+
+def test_sem_mudancas():
+    anteriores = [linha("261160"), linha("261170")]
+    _, inserts, updates, deletes = calcular_delta(anteriores, [dict(r) for r in anteriores])
+    assert (inserts, updates, deletes) == ([], [], [])
+
+
+def test_inserts_updates_deletes():
+    anteriores = [linha("261160"), linha("261170"), linha("261180")]
+    novas = [linha("261160"), linha("261170", total="12", perc="2,0"), linha("261190")]
+    _, inserts, updates, deletes = calcular_delta(anteriores, novas)
+    assert [r["Codigo_IBGE"] for r in inserts] == ["261190"]
+    assert [r["Codigo_IBGE"] for r in deletes] == ["261180"]
+    assert len(updates) == 1
+    assert updates[0]["Total"] == "12"
+    assert updates[0]["Colunas_Alteradas"] == "Total|Elevado_Perc"
+
+
+def test_mesma_cidade_em_outra_combinacao_nao_casa():
+    _, inserts, updates, deletes = calcular_delta([linha("261160", raca="01")], [linha("261160", raca="02")])
+    assert len(inserts) == 1 and len(deletes) == 1 and updates == []
+
+
+def test_carga_inicial_sem_csv_anterior(tmp_path):
+    novo = tmp_path / "novo.csv"
+    gravar(novo, [linha("261160"), linha("261170")])
+    registro = registrar_delta(str(tmp_path / "inexistente.csv"), str(novo), str(tmp_path / "deltas"), 2024)
+    assert (registro["inserts"], registro["updates"], registro["deletes"]) == (2, 0, 0)
+    assert registro["anterior"] is None
+    inserts = list(ler_linhas(str(tmp_path / "deltas" / registro["arquivos"]["inserts"])))
+    assert [r["Codigo_IBGE"] for r in inserts] == ["261160", "261170"]
+    changelog = (tmp_path / "deltas" / "changelog.jsonl").read_text(encoding="utf-8").splitlines()
+    assert json.loads(changelog[0])["linhas_novas"] == 2